@@ -49,11 +49,13 @@ from .nodes.image.image_metadata_io import (
     ImageLoadWithMetadata,
     ImageSaveWithMetadata
 )
+from .nodes.image.image_deduplicate import ImageDeduplicate
 
 from .nodes.yaml.yaml_save_prompt import YAMLSavePrompt
 from .nodes.yaml.yaml_load_prompt import YAMLLoadPrompt
 
 from .nodes.production.save_video_with_metadata import SaveVideoWithMetadata
+from .nodes.production.save_video_stream import SaveVideoStream
 from .nodes.production.generate_creation_time import GenerateCreationTime
 from .nodes.production.text_watermark import TextWatermark
 from .nodes.production.image_watermark import ImageWatermark
@@ -110,6 +112,7 @@ NODE_CLASS_MAPPINGS = {
     "ImagesLoadWithMetadata": ImagesLoadWithMetadata,
     "ImageLoadWithMetadata": ImageLoadWithMetadata,
     "ImageSaveWithMetadata": ImageSaveWithMetadata,
+    "ImageDeduplicate": ImageDeduplicate,
 
     "FormatDatePath": FormatDatePath,
     "FileSavePath": FileSavePath,
@@ -119,6 +122,7 @@ NODE_CLASS_MAPPINGS = {
     "YAMLLoadPrompt": YAMLLoadPrompt,
 
     "SaveVideoWithMetadata": SaveVideoWithMetadata,
+    "SaveVideoStream": SaveVideoStream,
     "GenerateCreationTime": GenerateCreationTime,
     "TextWatermark": TextWatermark,
     "ImageWatermark": ImageWatermark,
@@ -168,6 +172,7 @@ NODE_DISPLAY_NAME_MAPPINGS = {
     "ImagesLoadWithMetadata": "Images LoadWithMetadata",
     "ImageLoadWithMetadata": "Image LoadWithMetadata",
     "ImageSaveWithMetadata": "Image SaveWithMetadata",
+    "ImageDeduplicate": "Image Deduplicate",
 
     "FormatDatePath": "FormatDatePath",
     "FileSavePath": "FileSavePath",
@@ -177,6 +182,7 @@ NODE_DISPLAY_NAME_MAPPINGS = {
     "YAMLLoadPrompt": "YAML LoadPrompt",
 
     "SaveVideoWithMetadata": "SaveVideoWithMetadata",
+    "SaveVideoStream": "SaveVideoStream",
     "GenerateCreationTime": "GenerateCreationTime",
     "TextWatermark": "TextWatermark",
     "ImageWatermark": "ImageWatermark",
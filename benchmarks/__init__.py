@@ -0,0 +1,6 @@
+"""
+Standalone benchmarks for ComfyUI-StalkerVr internals.
+Run from the repository root, e.g.:
+    python -m benchmarks.image_conversion
+They import only the dependency-free helpers in `common/` and never require a running ComfyUI.
+"""
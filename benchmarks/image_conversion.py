@@ -0,0 +1,114 @@
+"""
+Tensor <-> PIL conversion benchmark: legacy NumPy float32 path vs common.images.
+
+Each case runs in a fresh process so peak RSS growth is measured in isolation.
+Usage:
+    python -m benchmarks.image_conversion [--width 3840 --height 2160 --frames 81 --frame-width 1280 --frame-height 720]
+"""
+import argparse
+import json
+import multiprocessing as mp
+import time
+
+import numpy as np
+import torch
+from PIL import Image
+
+from common.images import tensor2pil, pil2tensor, pils2tensor, tensor_to_uint8
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+# ─── Legacy implementations (as they were before common.images) ─────────
+def _legacy_pil2tensor(img):
+    return torch.from_numpy(np.array(img).astype(np.float32) / 255.0).unsqueeze(0)
+
+
+def _legacy_tensor2pil(t):
+    return Image.fromarray(np.clip(255. * t.cpu().numpy().squeeze(), 0, 255).astype(np.uint8))
+
+
+def _legacy_batch_to_uint8(images):
+    return (images.cpu().numpy() * 255.0).clip(0, 255).astype(np.uint8)
+
+
+def _legacy_pils2tensor(pils):
+    return torch.stack([torch.from_numpy(np.array(p).astype(np.float32) / 255.0) for p in pils], dim=0)
+
+
+def _make_input(kind, args):
+    gen = torch.Generator().manual_seed(0)
+    if kind == "image_tensor":
+        return torch.rand((1, args.height, args.width, 3), generator=gen)
+    if kind == "image_pil":
+        return Image.fromarray(tensor_to_uint8(torch.rand((args.height, args.width, 3), generator=gen)).numpy())
+    if kind == "frames_tensor":
+        return torch.rand((args.frames, args.frame_height, args.frame_width, 3), generator=gen)
+    if kind == "frames_pil":
+        frame = Image.fromarray(tensor_to_uint8(torch.rand((args.frame_height, args.frame_width, 3), generator=gen)).numpy())
+        return [frame.copy() for _ in range(args.frames)]
+    raise ValueError(kind)
+
+
+CASES = {
+    "pil2tensor_4k": ("image_pil", _legacy_pil2tensor, pil2tensor),
+    "tensor2pil_4k": ("image_tensor", _legacy_tensor2pil, tensor2pil),
+    "batch_to_uint8": ("frames_tensor", _legacy_batch_to_uint8, tensor_to_uint8),
+    "pils_to_batch": ("frames_pil", _legacy_pils2tensor, pils2tensor),
+}
+
+
+def _run_case(name, impl, args, queue):
+    kind, legacy, current = CASES[name]
+    func = legacy if impl == "legacy" else current
+    data = _make_input(kind, args)
+    base = _peak_rss_mb()
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        result = func(data)
+        del result
+    elapsed = (time.perf_counter() - start) / args.repeat
+    peak = _peak_rss_mb()
+    queue.put({
+        "case": name,
+        "impl": impl,
+        "ms": round(elapsed * 1000.0, 2),
+        "peak_rss_growth_mb": round(peak - base, 1) if peak is not None else None,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=3840)
+    parser.add_argument("--height", type=int, default=2160)
+    parser.add_argument("--frames", type=int, default=81)
+    parser.add_argument("--frame-width", type=int, default=1280)
+    parser.add_argument("--frame-height", type=int, default=720)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--cases", nargs="*", default=list(CASES))
+    args = parser.parse_args()
+
+    ctx = mp.get_context("spawn")
+    results = []
+    for name in args.cases:
+        for impl in ("legacy", "current"):
+            queue = ctx.Queue()
+            proc = ctx.Process(target=_run_case, args=(name, impl, args, queue))
+            proc.start()
+            results.append(queue.get())
+            proc.join()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
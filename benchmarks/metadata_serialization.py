@@ -0,0 +1,93 @@
+"""
+PNG metadata serialization benchmark: text chunks built per frame (legacy) vs once per batch.
+
+A synthetic workflow with many nodes stands in for a large ComfyUI graph. Both paths
+encode the same small frames; the difference is the JSON dumps and zlib work per file.
+Usage:
+    python -m benchmarks.metadata_serialization [--frames 81 --nodes 2000 --size 256]
+"""
+import argparse
+import io
+import json
+import time
+
+from PIL import Image, PngImagePlugin
+
+from common.image_formats import build_pnginfo
+
+
+def _legacy_pnginfo(save_workflow, extra_pnginfo, metadata_dict):
+    # As ImageSaveWithMetadata did before metadata was hoisted out of the frame loop
+    pnginfo = PngImagePlugin.PngInfo()
+    if save_workflow and extra_pnginfo:
+        for k, v in extra_pnginfo.items():
+            pnginfo.add_text(k, json.dumps(v))
+    if metadata_dict:
+        meta_str = json.dumps(metadata_dict, ensure_ascii=False, separators=(',', ':'))
+        if len(meta_str) > 1024:
+            pnginfo.add_text("comfy_metadata", meta_str)
+        elif any(ord(c) > 127 for c in meta_str):
+            pnginfo.add_itxt("comfy_metadata", meta_str, lang="", tkey="")
+        else:
+            pnginfo.add_text("comfy_metadata", meta_str)
+    return pnginfo
+
+
+def _make_workflow(nodes):
+    workflow = {"nodes": [], "links": []}
+    prompt = {}
+    for i in range(nodes):
+        workflow["nodes"].append({
+            "id": i, "type": f"Node{i % 37}", "pos": [i * 10.5, i * 3.25], "size": [320, 180],
+            "inputs": [{"name": f"in_{j}", "type": "IMAGE", "link": i * 4 + j} for j in range(3)],
+            "outputs": [{"name": "out", "type": "IMAGE", "links": [i * 4 + 3]}],
+            "widgets_values": [f"a detailed prompt text for node {i}", 0.75, 20, "euler", i * 7919],
+        })
+        workflow["links"].append([i * 4 + 3, i, 0, i + 1, 0, "IMAGE"])
+        prompt[str(i)] = {"class_type": f"Node{i % 37}", "inputs": {"seed": i * 7919, "text": f"prompt {i}"}}
+    return {"workflow": workflow, "prompt": prompt}
+
+
+def _time_batch(frames, per_frame, extra_pnginfo, metadata_dict):
+    img = Image.new("RGB", (frames[0], frames[0]))
+    start = time.perf_counter()
+    shared = None if per_frame else build_pnginfo(True, extra_pnginfo, metadata_dict)
+    metadata_s = time.perf_counter() - start
+    sizes = []
+    for _ in range(frames[1]):
+        t0 = time.perf_counter()
+        pnginfo = _legacy_pnginfo(True, extra_pnginfo, metadata_dict) if per_frame else shared
+        metadata_s += time.perf_counter() - t0
+        buf = io.BytesIO()
+        img.save(buf, format="PNG", pnginfo=pnginfo, compress_level=1)
+        sizes.append(buf.tell())
+    return time.perf_counter() - start, metadata_s, sum(sizes) / len(sizes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=81)
+    parser.add_argument("--nodes", type=int, default=2000)
+    parser.add_argument("--size", type=int, default=256, help="Frame edge in pixels")
+    parser.add_argument("--metadata-kb", type=int, default=64, help="Approximate comfy_metadata size")
+    args = parser.parse_args()
+
+    extra_pnginfo = _make_workflow(args.nodes)
+    metadata_dict = {"notes": "x" * (args.metadata_kb * 1024), "label": "café"}
+    workflow_kb = len(json.dumps(extra_pnginfo)) / 1024.0
+
+    results = {"frames": args.frames, "workflow_kb": round(workflow_kb, 1), "cases": {}}
+    for name, per_frame in (("per_frame", True), ("per_batch", False)):
+        total, metadata_s, avg_size = _time_batch((args.size, args.frames), per_frame, extra_pnginfo, metadata_dict)
+        results["cases"][name] = {
+            "total_ms": round(total * 1000, 1),
+            "metadata_ms_per_frame": round(metadata_s * 1000 / args.frames, 3),
+            "file_kb": round(avg_size / 1024.0, 1),
+        }
+    legacy, current = results["cases"]["per_frame"], results["cases"]["per_batch"]
+    results["saved_ms_per_frame"] = round(legacy["metadata_ms_per_frame"] - current["metadata_ms_per_frame"], 3)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Video encoding presets on synthetic frame batches.
+
+Every codec/quality pair from common.video_presets encodes the same generated batch
+through common.ffmpeg.feed_frames, the path SaveVideoWithMetadata uses. Records
+overall fps, the share of wall time spent converting tensors, pipe throughput,
+output size and ffmpeg's peak RSS. Codecs missing from the local ffmpeg are skipped.
+Usage:
+    python -m benchmarks.video_encoding [--width 1280 --height 720 --frames 48]
+        [--content noise gradient static] [--codecs libx264 ffv1] [--qualities high]
+        [--speed auto] [--yuv-conversion ffmpeg] [--output results.json]
+"""
+import argparse
+import functools
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+import torch
+import torch.nn.functional as F
+
+from common.ffmpeg import feed_frames, ffmpeg_encoders, rgb24_chunk
+from common.video_presets import CODECS, QUALITIES, SPEEDS, codec_args, output_args, required_encoders
+from common.yuv import color_tag_args, yuv420p_chunk
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+CONTENTS = ("noise", "gradient", "static")
+
+
+def _frames(content, args):
+    """Synthetic IMAGE batch (B, H, W, 3) in [0, 1]: worst case, smooth motion, no motion."""
+    gen = torch.Generator().manual_seed(0)
+    if content == "noise":
+        return torch.rand((args.frames, args.height, args.width, 3), generator=gen)
+    if content == "gradient":
+        t = torch.arange(args.frames).view(-1, 1, 1, 1) / max(args.frames, 1)
+        y = torch.linspace(0, 1, args.height).view(1, -1, 1, 1)
+        x = torch.linspace(0, 1, args.width).view(1, 1, -1, 1)
+        phase = torch.tensor([0.0, 1 / 3, 2 / 3]).view(1, 1, 1, 3)
+        return torch.remainder(0.6 * x + 0.4 * y + t + phase, 1.0)
+    coarse = torch.rand((1, 3, 9, 16), generator=gen)
+    frame = F.interpolate(coarse, size=(args.height, args.width), mode="bilinear").permute(0, 2, 3, 1)
+    return frame.expand(args.frames, -1, -1, -1).contiguous()
+
+
+def _watch_peak_rss(pid, stop, peak):
+    """Poll ffmpeg's VmHWM (Linux); the last sample before exit is its peak RSS."""
+    path = f"/proc/{pid}/status"
+    while not stop.wait(0.05):
+        try:
+            with open(path, encoding="ascii") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        peak[0] = max(peak[0] or 0.0, int(line.split()[1]) / 1024.0)
+        except (OSError, ValueError):
+            return
+
+
+def _encode(cmd, images, convert):
+    """Feed ffmpeg like the node does while sampling its peak RSS."""
+    with tempfile.TemporaryFile() as stderr:
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=stderr)
+        stop, peak = threading.Event(), [None]
+        watcher = threading.Thread(target=_watch_peak_rss, args=(proc.pid, stop, peak), daemon=True)
+        watcher.start()
+        start = time.perf_counter()
+        stats = feed_frames(proc.stdin, images, convert)
+        proc.stdin.close()
+        proc.wait()
+        elapsed = time.perf_counter() - start
+        stop.set()
+        watcher.join()
+        stderr.seek(0)
+        error = stderr.read().decode("utf-8", "replace")[-500:]
+    return proc.returncode, error, stats, elapsed, peak[0]
+
+
+def _run_case(images, content, codec, quality, args, workdir):
+    options, pix_fmt, container = codec_args(codec, quality, args.speed)
+    height, width = images.shape[1:3]
+    input_pix_fmt, convert = "rgb24", rgb24_chunk
+    if args.yuv_conversion != "ffmpeg" and pix_fmt == "yuv420p" and height % 2 == 0 and width % 2 == 0:
+        input_pix_fmt = "yuv420p"
+        convert = functools.partial(yuv420p_chunk, matrix=args.yuv_conversion)
+        options += color_tag_args(args.yuv_conversion)
+
+    path = os.path.join(workdir, f"{content}_{codec}_{quality}{container}")
+    _, out_args, _ = output_args(container, options)
+    cmd = ["ffmpeg", "-y", "-loglevel", "error", "-f", "rawvideo", "-pix_fmt", input_pix_fmt,
+           "-s", f"{width}x{height}", "-r", str(args.fps), "-i", "-"] + out_args + [path]
+    returncode, error, stats, elapsed, peak_rss = _encode(cmd, images, convert)
+    if returncode != 0:
+        return {"error": error}
+
+    size = os.path.getsize(path)
+    os.remove(path)
+    frame_bytes = len(convert(images[:1]))
+    return {
+        "input_pix_fmt": input_pix_fmt,
+        "fps": round(args.frames / elapsed, 2),
+        "convert_share_pct": round(stats["convert_s"] / elapsed * 100, 1),
+        "pipe_mb_per_s": round(frame_bytes * args.frames / elapsed / 1048576.0, 1),
+        "size_bytes": size,
+        "bits_per_pixel": round(size * 8 / (width * height * args.frames), 4),
+        # Sampled every 50 ms, so very short encodes may report None
+        "ffmpeg_peak_rss_mb": round(peak_rss, 1) if peak_rss is not None else None,
+        "feed_peak_buffer_mb": round(stats["peak_buffer_bytes"] / 1048576.0, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--frames", type=int, default=48)
+    parser.add_argument("--fps", type=float, default=24.0)
+    parser.add_argument("--content", nargs="+", choices=CONTENTS, default=list(CONTENTS))
+    parser.add_argument("--codecs", nargs="+", choices=list(CODECS), default=list(CODECS))
+    parser.add_argument("--qualities", nargs="+", choices=QUALITIES, default=list(QUALITIES))
+    parser.add_argument("--speed", choices=SPEEDS, default="auto")
+    parser.add_argument("--yuv-conversion", choices=["ffmpeg", "bt709", "bt601"], default="ffmpeg")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    if shutil.which("ffmpeg") is None:
+        raise SystemExit("ffmpeg not found on PATH")
+
+    available = ffmpeg_encoders()
+    cases, skipped = [], []
+    for codec in args.codecs:
+        for quality in args.qualities:
+            if quality not in CODECS[codec]["quality"]:
+                skipped.append({"codec": codec, "quality": quality, "reason": "no such quality level"})
+                continue
+            missing = [name for name in required_encoders(codec, quality) if name not in available]
+            if missing:
+                skipped.append({"codec": codec, "quality": quality, "reason": f"ffmpeg lacks {', '.join(missing)}"})
+                continue
+            cases.append((codec, quality))
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="stalker-video-bench-") as workdir:
+        for content in args.content:
+            images = _frames(content, args)
+            for codec, quality in cases:
+                result = _run_case(images, content, codec, quality, args, workdir)
+                results.append({"content": content, "codec": codec, "quality": quality, **result})
+            del images
+
+    report = {
+        "resolution": f"{args.width}x{args.height}",
+        "frames": args.frames,
+        "fps": args.fps,
+        "speed": args.speed,
+        "yuv_conversion": args.yuv_conversion,
+        "cpu_count": os.cpu_count(),
+        "results": results,
+        "skipped": skipped,
+        # Includes the synthetic batches themselves
+        "python_peak_rss_mb": (round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, 1)
+                               if resource is not None else None),
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+FFmpeg pipe throughput: rgb24 frames converted by ffmpeg vs yuv420p converted client-side.
+
+Both cases feed ffmpeg through common.ffmpeg.feed_frames and end in a yuv420p null
+output, so the difference is who converts and how many bytes cross the pipe.
+Also reports how closely the client planes match ffmpeg's own conversion.
+Usage:
+    python -m benchmarks.yuv_pipe [--width 1280 --height 720 --frames 120 --matrix bt709]
+"""
+import argparse
+import functools
+import json
+import shutil
+import subprocess
+import time
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+from common.ffmpeg import feed_frames, rgb24_chunk
+from common.images import tensor_to_uint8
+from common.yuv import rgb_to_yuv420p, yuv420p_chunk
+
+
+def _frames(args):
+    gen = torch.Generator().manual_seed(0)
+    coarse = torch.rand((args.frames, 3, 9, 16), generator=gen)
+    return F.interpolate(coarse, size=(args.height, args.width), mode="bilinear").permute(0, 2, 3, 1).contiguous()
+
+
+def _run_pipe(images, args, pix_fmt, convert):
+    cmd = ["ffmpeg", "-loglevel", "error", "-f", "rawvideo", "-pix_fmt", pix_fmt,
+           "-s", f"{args.width}x{args.height}", "-r", "24", "-i", "-",
+           "-pix_fmt", "yuv420p", "-f", "null", "-"]
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+    start = time.perf_counter()
+    stats = feed_frames(proc.stdin, images, convert)
+    proc.stdin.close()
+    proc.wait()
+    elapsed = time.perf_counter() - start
+    frame_bytes = len(convert(images[:1]))
+    return {
+        "fps": round(args.frames / elapsed, 1),
+        "convert_fps": round(args.frames / stats["convert_s"], 1),
+        "bytes_per_frame": frame_bytes,
+        "pipe_mb_per_s": round(frame_bytes * args.frames / elapsed / 1048576.0, 1),
+    }
+
+
+def _compare(images, args):
+    """Client planes vs ffmpeg's area-filtered conversion of the same rgb24 input."""
+    sample = images[:4]
+    cm = args.matrix
+    cmd = ["ffmpeg", "-loglevel", "error", "-f", "rawvideo", "-pix_fmt", "rgb24",
+           "-s", f"{args.width}x{args.height}", "-i", "-",
+           "-vf", f"scale=out_color_matrix={cm}:out_range=tv:flags=area+accurate_rnd+full_chroma_int",
+           "-f", "rawvideo", "-pix_fmt", "yuv420p", "-"]
+    result = subprocess.run(cmd, input=tensor_to_uint8(sample).numpy().tobytes(), capture_output=True, check=True)
+    reference = np.frombuffer(result.stdout, dtype=np.uint8).reshape(sample.shape[0], -1).astype(np.int16)
+    ours = rgb_to_yuv420p(sample, args.matrix).numpy().astype(np.int16)
+    diff = np.abs(ours - reference)
+    return {"max_abs_diff": int(diff.max()), "identical_pct": round(float((diff == 0).mean() * 100), 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--frames", type=int, default=120)
+    parser.add_argument("--matrix", choices=["bt709", "bt601"], default="bt709")
+    args = parser.parse_args()
+
+    if shutil.which("ffmpeg") is None:
+        raise SystemExit("ffmpeg not found on PATH")
+
+    images = _frames(args)
+    results = {
+        "resolution": f"{args.width}x{args.height}",
+        "frames": args.frames,
+        "rgb24_ffmpeg_convert": _run_pipe(images, args, "rgb24", rgb24_chunk),
+        "yuv420p_client_convert": _run_pipe(images, args, "yuv420p",
+                                            functools.partial(yuv420p_chunk, matrix=args.matrix)),
+        "vs_ffmpeg_" + args.matrix: _compare(images, args),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,21 @@
 # nodes/utils/__init__.py
 
-from .fonts import get_system_font_names, find_font_path, load_font, BIDI_AVAILABLE
-from .images import tensor2pil, pil2tensor
+from .fonts import get_system_font_names, find_font_path, load_font, font_cache_stats, BIDI_AVAILABLE
+from .images import tensor2pil, pil2tensor, pil2mask, pils2tensor, tensor_to_uint8, pil_to_uint8, uint8_to_float
 
 __all__ = [
         # Font utilities
     "get_system_font_names",
     "find_font_path",
     "load_font",
+    "font_cache_stats",
     "BIDI_AVAILABLE",
     # Image utilities
     "tensor2pil",
     "pil2tensor",
+    "pil2mask",
+    "pils2tensor",
+    "tensor_to_uint8",
+    "pil_to_uint8",
+    "uint8_to_float",
 ]
\ No newline at end of file
@@ -0,0 +1,174 @@
+import io
+import os
+import queue
+import struct
+import threading
+import time
+
+from PIL import Image
+
+from ..config.config_manager import ConfigManager
+from .logger import LogEntry, log
+from .writers import atomic_write
+
+try:
+    from server import PromptServer
+except ImportError:
+    PromptServer = None
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def read_png_chunks(data):
+    """
+    Split PNG bytes into raw chunks.
+    Returns:
+        List of (type, raw_bytes) where raw_bytes is the complete chunk (length, type, data, CRC)
+    """
+    if not data.startswith(PNG_SIGNATURE):
+        raise ValueError("Not a PNG file")
+    chunks = []
+    pos = len(PNG_SIGNATURE)
+    while pos < len(data):
+        length, = struct.unpack(">I", data[pos:pos + 4])
+        end = pos + 12 + length
+        if end > len(data):
+            raise ValueError("Truncated PNG chunk")
+        chunks.append((data[pos + 4:pos + 8], data[pos:end]))
+        pos = end
+    return chunks
+
+
+def recompress_png(data, level=9):
+    """
+    Re-encode the pixel data of an 8-bit RGB/RGBA PNG at a higher zlib level.
+    Every chunk except IDAT is copied byte-for-byte from the original, so
+    tEXt/zTXt/iTXt metadata (workflow, comfy_metadata) is untouched.
+    Returns:
+        New PNG bytes, or None if the file is not eligible
+    """
+    chunks = read_png_chunks(data)
+    ihdr = chunks[0][1]
+    if chunks[0][0] != b"IHDR":
+        return None
+    # IHDR payload: width, height, bit depth, color type, compression, filter, interlace
+    bit_depth, color_type, interlace = ihdr[16], ihdr[17], ihdr[20]
+    if bit_depth != 8 or color_type not in (2, 6) or interlace != 0:
+        return None
+
+    with Image.open(io.BytesIO(data)) as img:
+        img.load()
+        buf = io.BytesIO()
+        img.save(buf, format="PNG", compress_level=level, optimize=level >= 9)
+
+    new_chunks = read_png_chunks(buf.getvalue())
+    if new_chunks[0][1] != ihdr:
+        return None
+    new_idat = [raw for ctype, raw in new_chunks if ctype == b"IDAT"]
+
+    out = [PNG_SIGNATURE]
+    idat_written = False
+    for ctype, raw in chunks:
+        if ctype == b"IDAT":
+            if not idat_written:
+                out.extend(new_idat)
+                idat_written = True
+            continue
+        out.append(raw)
+    return b"".join(out)
+
+
+def is_comfy_queue_busy():
+    """True while ComfyUI has prompts running or pending."""
+    if PromptServer is None or getattr(PromptServer, "instance", None) is None:
+        return False
+    try:
+        return PromptServer.instance.prompt_queue.get_tasks_remaining() > 0
+    except Exception:
+        return False
+
+
+class PngCompactor:
+    """
+    Background worker that recompresses PNGs written at a low compression level.
+    Runs only while the ComfyUI queue is idle and replaces files atomically.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._initialize()
+        return cls._instance
+
+    def _initialize(self):
+        config = ConfigManager()
+        self._queue = queue.Queue(maxsize=max(1, int(config.get("compaction.queue_size", 10000))))
+        self._idle_poll = float(config.get("compaction.idle_poll_seconds", 2.0))
+        self._thread = None
+        self.files_done = 0
+        self.bytes_before = 0
+        self.bytes_after = 0
+
+    def enqueue(self, paths, level=9):
+        """Schedule files for recompression; files that change before their turn are skipped."""
+        self._ensure_thread()
+        for path in paths:
+            try:
+                st = os.stat(path)
+                self._queue.put_nowait((str(path), level, st.st_mtime_ns, st.st_size))
+            except queue.Full:
+                log(LogEntry(node_class="PngCompactor", title="Queue full, skipped", details={"File": str(path)}))
+            except OSError:
+                continue
+
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="stalker-png-compactor", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            path, level, mtime_ns, size = self._queue.get()
+            try:
+                while is_comfy_queue_busy():
+                    time.sleep(self._idle_poll)
+                self._compact(path, level, mtime_ns, size)
+            except Exception as e:
+                log(LogEntry(node_class="PngCompactor", title="Compaction failed",
+                             details={"File": os.path.basename(path), "Error": str(e)}))
+            finally:
+                self._queue.task_done()
+
+    def _compact(self, path, level, mtime_ns, size):
+        st = os.stat(path)
+        if st.st_mtime_ns != mtime_ns or st.st_size != size:
+            return
+        with open(path, "rb") as f:
+            data = f.read()
+        compacted = recompress_png(data, level)
+        if compacted is None or len(compacted) >= len(data):
+            return
+
+        def write(tmp):
+            with open(tmp, "wb") as f:
+                f.write(compacted)
+            os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+        atomic_write(path, write)
+
+        self.files_done += 1
+        self.bytes_before += len(data)
+        self.bytes_after += len(compacted)
+        log(LogEntry(node_class="PngCompactor", title="Compacted", details={
+            "File": os.path.basename(path),
+            "Size": f"{len(data) / 1024.0:.1f} KB -> {len(compacted) / 1024.0:.1f} KB",
+            "Saved Total": f"{(self.bytes_before - self.bytes_after) / 1048576.0:.1f} MB over {self.files_done} files",
+            "Pending": self._queue.qsize(),
+        }))
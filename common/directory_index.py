@@ -0,0 +1,89 @@
+import json
+import os
+import threading
+
+from .writers import atomic_write
+
+# ─── Per-Directory Index ────────────────────────────────────────────────
+# A hidden JSON file inside an image directory that remembers state between
+# runs: watch cursors (which files were already emitted) and perceptual hashes.
+# Loaded once per process and shared; writes are atomic.
+
+INDEX_NAME = ".stalkervr_index.json"
+INDEX_VERSION = 1
+
+_INDEXES = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+class DirectoryIndex:
+    def __init__(self, directory):
+        self.directory = directory
+        self.path = os.path.join(directory, INDEX_NAME)
+        self.lock = threading.Lock()
+        self._data = self._load()
+
+    @classmethod
+    def for_directory(cls, directory):
+        """Shared index for `directory` (one instance per real path)."""
+        directory = os.path.realpath(str(directory))
+        with _INDEXES_LOCK:
+            index = _INDEXES.get(directory)
+            if index is None:
+                index = _INDEXES[directory] = cls(directory)
+            return index
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict) and data.get("version") == INDEX_VERSION:
+                return data
+        except (OSError, ValueError):
+            pass
+        return {"version": INDEX_VERSION, "cursors": {}}
+
+    def get_cursor(self, name):
+        """Last emitted (mtime_ns, filename) for watch `name`, or None."""
+        with self.lock:
+            cursor = self._data["cursors"].get(name)
+        return (int(cursor[0]), str(cursor[1])) if cursor else None
+
+    def set_cursor(self, name, cursor):
+        with self.lock:
+            if cursor is None:
+                self._data["cursors"].pop(name, None)
+            else:
+                self._data["cursors"][name] = [int(cursor[0]), str(cursor[1])]
+
+    def get_hash(self, hash_type, name, mtime_ns, size):
+        """Cached hash of file `name`, or None if missing or the file changed since."""
+        with self.lock:
+            entry = self._data.get("hashes", {}).get(hash_type, {}).get(name)
+        if entry and entry[0] == mtime_ns and entry[1] == size:
+            return int(entry[2], 16)
+        return None
+
+    def set_hash(self, hash_type, name, mtime_ns, size, value):
+        with self.lock:
+            table = self._data.setdefault("hashes", {}).setdefault(hash_type, {})
+            table[name] = [int(mtime_ns), int(size), f"{value:016x}"]
+
+    def prune_hashes(self, names):
+        """Drop cached hashes for files not in `names` (deleted or renamed)."""
+        names = set(names)
+        with self.lock:
+            for table in self._data.get("hashes", {}).values():
+                for name in [n for n in table if n not in names]:
+                    del table[name]
+
+    def save(self):
+        """Persist the index; raises OSError if the directory is not writable."""
+        with self.lock:
+            payload = json.dumps(self._data, ensure_ascii=False, separators=(',', ':'))
+
+        def write(tmp):
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(payload)
+
+        atomic_write(self.path, write)
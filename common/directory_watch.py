@@ -0,0 +1,117 @@
+import ctypes
+import ctypes.util
+import itertools
+import os
+import struct
+import sys
+import threading
+
+# ─── Directory Change Detection ─────────────────────────────────────────
+# On Linux an inotify watch bumps a per-directory generation counter, so
+# "did anything change?" costs nothing. Elsewhere (or when inotify is not
+# available / out of watches) a stat scan of the directory is used instead.
+
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_IGNORED = 0x00008000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = (_IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE
+               | _IN_DELETE | _IN_DELETE_SELF | _IN_MOVE_SELF)
+_EVENT_HEADER = struct.Struct("iIII")
+
+_libc = None
+if sys.platform.startswith("linux"):
+    try:
+        _libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        _libc.inotify_init1
+    except (OSError, AttributeError):
+        _libc = None
+
+INOTIFY_AVAILABLE = _libc is not None
+
+_WATCHERS = {}
+_WATCHERS_LOCK = threading.Lock()
+_EPOCHS = itertools.count(1)
+
+
+class _InotifyWatcher:
+    def __init__(self, directory):
+        self.generation = 0
+        self.alive = False
+        fd = _libc.inotify_init1(_IN_CLOEXEC)
+        if fd < 0:
+            return
+        if _libc.inotify_add_watch(fd, os.fsencode(directory), _WATCH_MASK) < 0:
+            os.close(fd)
+            return
+        self._fd = fd
+        self.alive = True
+        threading.Thread(target=self._run, name="stalker-dir-watch", daemon=True).start()
+
+    def _run(self):
+        while self.alive:
+            try:
+                data = os.read(self._fd, 65536)
+            except OSError:
+                break
+            pos, changed = 0, False
+            while pos + _EVENT_HEADER.size <= len(data):
+                _, mask, _, length = _EVENT_HEADER.unpack_from(data, pos)
+                name = data[pos + _EVENT_HEADER.size:pos + _EVENT_HEADER.size + length].rstrip(b"\0")
+                pos += _EVENT_HEADER.size + length
+                if mask & (_IN_IGNORED | _IN_DELETE_SELF | _IN_MOVE_SELF):
+                    self.alive = False
+                # Hidden names are our own index and temp files; a finished temp write shows up as a rename
+                if not name.startswith(b"."):
+                    changed = True
+            if changed:
+                self.generation += 1
+        self.alive = False
+        os.close(self._fd)
+
+
+def scan_token(directory):
+    """Poll fallback: (file count, newest mtime_ns, name checksum), ignoring hidden files."""
+    count, newest, names = 0, 0, 0
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.startswith(".") or not entry.is_file():
+                    continue
+                count += 1
+                newest = max(newest, entry.stat().st_mtime_ns)
+                names ^= hash(entry.name)
+    except OSError:
+        return None
+    return count, newest, names
+
+
+def change_token(directory):
+    """
+    Cheap value that changes whenever files in `directory` are added, removed or rewritten.
+    Returns:
+        (backend, token) where backend is "inotify" or "polling"
+    """
+    directory = os.path.realpath(str(directory))
+    if INOTIFY_AVAILABLE:
+        with _WATCHERS_LOCK:
+            watcher = _WATCHERS.get(directory)
+            if watcher is None or not watcher.alive:
+                # A fresh watch starts at generation 0; a new epoch keeps tokens from repeating
+                watcher = _InotifyWatcher(directory) if os.path.isdir(directory) else None
+                if watcher is not None and watcher.alive:
+                    watcher.epoch = next(_EPOCHS)
+                    _WATCHERS[directory] = watcher
+                else:
+                    _WATCHERS.pop(directory, None)
+                    watcher = None
+        if watcher is not None:
+            return "inotify", (watcher.epoch, watcher.generation)
+    return "polling", scan_token(directory)
@@ -0,0 +1,318 @@
+import collections
+import functools
+import queue
+import re
+import subprocess
+import threading
+import time
+
+from .images import tensor_to_uint8
+
+# ─── FFmpeg Frame Feeding ───────────────────────────────────────────────
+# Frames are converted to uint8 in chunks on the calling thread while a
+# writer thread pushes finished chunks into ffmpeg's stdin. A bounded queue
+# keeps conversion at most `max_queued` chunks ahead of the encoder, so the
+# buffered bytes stay constant however long the video is.
+
+# Target size of one converted chunk
+_CHUNK_BYTES = 32 * 1024 * 1024
+
+
+def chunk_frames_for(frame_bytes, target_bytes=_CHUNK_BYTES, max_frames=16):
+    """Frames per chunk so that one converted chunk is about `target_bytes`."""
+    return max(1, min(max_frames, target_bytes // max(1, frame_bytes)))
+
+
+def rgb24_chunk(images):
+    """Default conversion: (B, H, W, C) float -> packed rgb24 bytes-like."""
+    # One float temporary per frame keeps the scaling pass cache-sized
+    return tensor_to_uint8(images[..., :3], chunk_size=1).numpy().reshape(-1)
+
+
+def feed_frames(stream, images, convert=rgb24_chunk, chunk_frames=None, max_queued=2, should_stop=None):
+    """
+    Convert frames chunk by chunk and write them to `stream` from a writer thread.
+    Args:
+        stream: Writable binary stream (usually `proc.stdin`); not closed here
+        images: Tensor (B, H, W, C)
+        convert: Callable turning a frame chunk into a C-contiguous bytes-like object
+        chunk_frames: Frames per chunk, default sized by `chunk_frames_for`
+        max_queued: Converted chunks allowed to wait for the writer
+        should_stop: Optional callable checked before each chunk; True stops feeding
+    Returns:
+        Stats dict: frames, convert_s, write_s, total_s, peak_buffer_bytes, broken_pipe, stopped
+    """
+    total = images.shape[0]
+    if chunk_frames is None:
+        chunk_frames = chunk_frames_for(images[0, ..., :3].numel())
+
+    pending = queue.Queue(maxsize=max(1, max_queued))
+    stats = {"frames": 0, "convert_s": 0.0, "write_s": 0.0, "total_s": 0.0,
+             "peak_buffer_bytes": 0, "broken_pipe": False, "stopped": False}
+    buffered = [0]
+    lock = threading.Lock()
+
+    def writer():
+        while True:
+            item = pending.get()
+            if item is None:
+                return
+            data, frames = item
+            if not stats["broken_pipe"]:
+                start = time.perf_counter()
+                try:
+                    stream.write(data)
+                    stats["frames"] += frames
+                except (BrokenPipeError, OSError):
+                    # ffmpeg exited; keep draining so the producer never blocks
+                    stats["broken_pipe"] = True
+                stats["write_s"] += time.perf_counter() - start
+            with lock:
+                buffered[0] -= len(data)
+
+    thread = threading.Thread(target=writer, name="stalker-ffmpeg-writer", daemon=True)
+    start_all = time.perf_counter()
+    thread.start()
+    try:
+        for start in range(0, total, chunk_frames):
+            if stats["broken_pipe"]:
+                break
+            if should_stop is not None and should_stop():
+                stats["stopped"] = True
+                break
+            t0 = time.perf_counter()
+            data = convert(images[start:start + chunk_frames])
+            stats["convert_s"] += time.perf_counter() - t0
+            with lock:
+                buffered[0] += len(data)
+                stats["peak_buffer_bytes"] = max(stats["peak_buffer_bytes"], buffered[0])
+            pending.put((data, min(chunk_frames, total - start)))
+    finally:
+        pending.put(None)
+        thread.join()
+    stats["total_s"] = time.perf_counter() - start_all
+    return stats
+
+
+def format_feed_stats(stats):
+    """Log-friendly frames/sec per stage."""
+    frames = stats["frames"]
+
+    def fps(seconds):
+        return f"{frames / seconds:.1f} fps" if seconds > 0 else "n/a"
+
+    return {
+        "Convert": fps(stats["convert_s"]),
+        "Pipe Write": fps(stats["write_s"]),
+        "Overall": fps(stats["total_s"]),
+        "Peak Buffer": f"{stats['peak_buffer_bytes'] / 1048576.0:.1f} MB",
+    }
+
+
+@functools.lru_cache(maxsize=4)
+def ffmpeg_encoders(binary="ffmpeg"):
+    """
+    Encoder names supported by the local ffmpeg build (queried once per process).
+    Raises:
+        RuntimeError: ffmpeg is not installed
+    """
+    try:
+        result = subprocess.run([binary, "-hide_banner", "-encoders"], capture_output=True, text=True, timeout=30)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise RuntimeError(f"ffmpeg is not available: {e}") from e
+    encoders = set()
+    for line in result.stdout.splitlines():
+        # " V....D libx264   libx264 H.264 / AVC ..." — flags column, then the name
+        parts = line.split()
+        if len(parts) >= 2 and len(parts[0]) == 6 and parts[0][0] in "VAS":
+            encoders.add(parts[1])
+    return frozenset(encoders)
+
+
+@functools.lru_cache(maxsize=4)
+def ffmpeg_version(binary="ffmpeg"):
+    """
+    (major, minor) of the local ffmpeg build, or None when unknown (git snapshots report
+    a revision instead of a release and are treated as current).
+    """
+    try:
+        result = subprocess.run([binary, "-hide_banner", "-version"], capture_output=True, text=True, timeout=30)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    # "ffmpeg version 4.4.2-0ubuntu0.22.04.1", "ffmpeg version n6.1", "ffmpeg version N-113000-g..."
+    match = re.match(r"\S+ version n?(\d+)\.(\d+)", result.stdout)
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+def ffmpeg_at_least(major, minor=0, binary="ffmpeg"):
+    version = ffmpeg_version(binary)
+    return version is None or version >= (major, minor)
+
+
+def vfr_args(binary="ffmpeg"):
+    """Keep the filtered timestamps of video stream 0: -fps_mode is ffmpeg 5.1+, older builds only have -vsync."""
+    return ["-fps_mode:v:0", "vfr"] if ffmpeg_at_least(5, 1, binary) else ["-vsync", "vfr"]
+
+
+def video_packet_times(path, binary="ffmpeg"):
+    """
+    (pts, duration) in seconds of every packet of the first video stream, in file order,
+    as the demuxer presents them (edit lists applied). Read by stream copy, nothing is decoded.
+    Raises:
+        RuntimeError: the file could not be read
+    """
+    result = subprocess.run([binary, "-v", "error", "-i", str(path), "-map", "0:v:0", "-c", "copy",
+                             "-f", "framecrc", "-"], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Could not read {path}: {result.stderr[-500:]}")
+    time_base, packets = 1.0, []
+    for line in result.stdout.splitlines():
+        # "#tb 0: 1/12288" header, then "0, dts, pts, duration, size, crc"
+        if line.startswith("#tb 0:"):
+            num, den = line.split(":", 1)[1].strip().split("/")
+            time_base = int(num) / int(den)
+        elif line and not line.startswith("#"):
+            fields = line.split(",")
+            packets.append((int(fields[2]) * time_base, int(fields[3]) * time_base))
+    return packets
+
+
+def _read_progress(stream, on_progress):
+    """Parse `-progress` key=value blocks; each block ends with a `progress=` line."""
+    block = {}
+    for raw in iter(stream.readline, b""):
+        key, _, value = raw.decode("utf-8", "replace").strip().partition("=")
+        if key != "progress":
+            block[key] = value
+            continue
+        if on_progress is not None:
+            try:
+                fps = float(block.get("fps", 0) or 0)
+            except ValueError:
+                fps = 0.0
+            try:
+                on_progress(int(block.get("frame", 0) or 0), fps)
+            except Exception:
+                pass  # progress display must never break the encode
+        block = {}
+
+
+def _spawn(cmd, pipe_stdin, on_progress, stderr_lines):
+    """Start ffmpeg with `-progress pipe:1` and reader threads for progress and the stderr tail."""
+    cmd = [cmd[0], "-nostats", "-progress", "pipe:1"] + list(cmd[1:])
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE if pipe_stdin else subprocess.DEVNULL,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    tail = collections.deque(maxlen=stderr_lines)
+
+    def read_stderr():
+        for line in iter(proc.stderr.readline, b""):
+            tail.append(line.decode("utf-8", "replace"))
+
+    readers = [threading.Thread(target=read_stderr, daemon=True),
+               threading.Thread(target=_read_progress, args=(proc.stdout, on_progress), daemon=True)]
+    for reader in readers:
+        reader.start()
+    return proc, tail, readers
+
+
+def _reap(proc, readers):
+    """Terminate (then kill) ffmpeg if it is still running and join the reader threads."""
+    if proc.poll() is None:
+        proc.terminate()
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+    for reader in readers:
+        reader.join(timeout=5)
+
+
+def run_ffmpeg(cmd, images=None, convert=rgb24_chunk, on_progress=None, should_stop=None, stderr_lines=200,
+               poll_interval=0.25):
+    """
+    Run ffmpeg, optionally feeding raw frames to stdin, with live progress and cooperative cancel.
+    Args:
+        cmd: Full command starting with the ffmpeg binary; progress options are added here
+        images: Optional tensor (B, H, W, C) piped through `feed_frames`
+        convert: Frame chunk converter for `feed_frames`
+        on_progress: Callable(frame, fps) invoked from a reader thread about twice per second
+        should_stop: Callable returning True to terminate ffmpeg
+        stderr_lines: Size of the stderr ring buffer (only the tail is kept)
+    Returns:
+        Dict: returncode, stderr (tail text), feed (feed_frames stats or None), interrupted
+    """
+    proc, tail, readers = _spawn(cmd, images is not None, on_progress, stderr_lines)
+    feed, interrupted = None, False
+    try:
+        if images is not None:
+            try:
+                feed = feed_frames(proc.stdin, images, convert, should_stop=should_stop)
+            finally:
+                try:
+                    proc.stdin.close()
+                except OSError:
+                    pass
+            interrupted = feed["stopped"]
+        while not interrupted:
+            try:
+                proc.wait(timeout=poll_interval)
+                break
+            except subprocess.TimeoutExpired:
+                interrupted = should_stop is not None and should_stop()
+    finally:
+        _reap(proc, readers)
+    return {"returncode": proc.returncode, "stderr": "".join(tail), "feed": feed, "interrupted": interrupted}
+
+
+class FFmpegStream:
+    """
+    Long-lived ffmpeg process reading raw frames from stdin, fed one batch at a time.
+    Only the batch being written is held in memory; the encoder keeps its state between
+    `write` calls, so a video can be assembled from many separate executions.
+    """
+
+    def __init__(self, cmd, stderr_lines=200):
+        self.on_progress = None
+        self.frames = 0
+        self.proc, self._tail, self._readers = _spawn(cmd, True, self._progress, stderr_lines)
+
+    def _progress(self, frame, fps):
+        callback = self.on_progress
+        if callback is not None:
+            callback(frame, fps)
+
+    @property
+    def alive(self):
+        return self.proc.poll() is None
+
+    @property
+    def stderr(self):
+        return "".join(self._tail)
+
+    def write(self, images, convert=rgb24_chunk, should_stop=None):
+        """Pipe one batch; returns `feed_frames` stats (check `broken_pipe` / `stopped`)."""
+        stats = feed_frames(self.proc.stdin, images, convert, should_stop=should_stop)
+        self.frames += stats["frames"]
+        return stats
+
+    def close(self, timeout=None):
+        """Signal end of input and wait for ffmpeg to finish the file; returns the exit code."""
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.proc.wait(timeout=timeout)
+        finally:
+            _reap(self.proc, self._readers)
+        return self.proc.returncode
+
+    def terminate(self):
+        """Stop ffmpeg without finishing the file."""
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        self.proc.terminate()
+        _reap(self.proc, self._readers)
@@ -1,8 +1,13 @@
 # nodes/utils/fonts.py
 
+import functools
+import json
+import logging
 import sys
 import os
 import subprocess
+import threading
+import time
 from pathlib import Path
 from PIL import ImageFont
 
@@ -14,90 +19,259 @@ try:
 except ImportError:
     BIDI_AVAILABLE = False
 
+try:
+    import folder_paths
+except ImportError:
+    folder_paths = None
 
-def get_system_font_names():
-    """Get list of available system fonts."""
+# ─── Font Catalog ───────────────────────────────────────────────────────
+# Every usable font (name -> path, family, style, validated) is kept in a JSON
+# file in the ComfyUI user directory. It is rebuilt in a background thread when
+# the mtime of any font directory changes; readers only see the last finished
+# catalog and never scan or open font files themselves.
+
+CATALOG_NAME = "stalkervr_font_catalog.json"
+CATALOG_VERSION = 1
+FALLBACK_FONTS = ("Arial", "DejaVuSans", "LiberationSans", "NotoSans")
+# Minimum time between directory mtime checks
+RECHECK_SECONDS = 60.0
+
+_CATALOG = None
+_CATALOG_LOCK = threading.Lock()
+_BUILD_THREAD = None
+_CHECKED_AT = 0.0
+
+
+def _warn(title, details):
+    """Log through the package logger; imported lazily so this module stays dependency-free."""
+    try:
+        from .logger import LogEntry, log
+    except ImportError:  # common imported as a top-level package (benchmarks)
+        logging.getLogger(__name__).warning("%s: %s", title, details)
+        return
+    log(LogEntry(node_class="TextWatermark", title=title, details=details))
+
+
+def _font_dirs():
+    """Platform font directories (roots; subdirectories are scanned too)."""
+    if sys.platform == "win32":
+        return [
+            Path(os.environ.get("WINDIR", "C:\\Windows")) / "Fonts",
+            Path.home() / "AppData/Local/Microsoft/Windows/Fonts",
+        ]
+    if sys.platform == "darwin":
+        return [
+            Path("/System/Library/Fonts"),
+            Path("/Library/Fonts"),
+            Path.home() / "Library/Fonts",
+        ]
+    return [
+        Path("/usr/share/fonts"),
+        Path("/usr/local/share/fonts"),
+        Path.home() / ".fonts",
+        Path.home() / ".local/share/fonts",
+    ]
+
+
+def catalog_path():
+    """JSON catalog location: the ComfyUI user directory, or ~/.cache outside ComfyUI."""
+    if folder_paths is not None and hasattr(folder_paths, "get_user_directory"):
+        base = Path(folder_paths.get_user_directory())
+    else:
+        base = Path.home() / ".cache" / "stalkervr"
+    return base / CATALOG_NAME
+
+
+def _dir_mtimes(dirs):
+    """mtime_ns of each existing directory; a missing directory maps to None."""
+    mtimes = {}
+    for directory in dirs:
+        try:
+            mtimes[str(directory)] = os.stat(directory).st_mtime_ns
+        except OSError:
+            mtimes[str(directory)] = None
+    return mtimes
+
+
+def _font_files():
+    """Font file paths from fontconfig, or a scan of the platform font directories."""
     fonts = set()
+    if sys.platform != "win32":
+        try:
+            result = subprocess.run(
+                ["fc-list", "--format=%{file}\\n"],
+                capture_output=True,
+                text=True,
+                timeout=10
+            )
+            if result.returncode == 0:
+                for line in result.stdout.strip().split('\n'):
+                    line = line.strip()
+                    if line and Path(line).exists():
+                        fonts.add(line)
+        except (subprocess.TimeoutExpired, FileNotFoundError, subprocess.SubprocessError):
+            pass
+
+    if not fonts:
+        for font_dir in _font_dirs():
+            if font_dir.exists():
+                for ext in ["*.ttf", "*.otf", "*.TTF", "*.OTF"]:
+                    fonts.update(str(f) for f in font_dir.rglob(ext))
+    return sorted(fonts)
+
 
+def _catalog_entry(path):
+    """Describe one font file; `valid` means it loads and renders a glyph."""
+    entry = {"path": str(path), "family": None, "style": None, "valid": False}
     try:
-        if sys.platform == "win32":
-            font_dirs = [
-                Path(os.environ.get("WINDIR", "C:\\Windows")) / "Fonts",
-                Path.home() / "AppData/Local/Microsoft/Windows/Fonts",
-            ]
-            for font_dir in font_dirs:
-                if font_dir.exists():
-                    for ext in ["*.ttf", "*.otf", "*.TTF", "*.OTF"]:
-                        fonts.update(font_dir.rglob(ext))
-        else:
-            try:
-                result = subprocess.run(
-                    ["fc-list", "--format=%{file}\\n"],
-                    capture_output=True,
-                    text=True,
-                    timeout=10
-                )
-                if result.returncode == 0:
-                    for line in result.stdout.strip().split('\n'):
-                        line = line.strip()
-                        if line and Path(line).exists():
-                            fonts.add(line)
-            except (subprocess.TimeoutExpired, FileNotFoundError, subprocess.SubprocessError):
-                pass
+        font = ImageFont.truetype(str(path), 12)
+        entry["family"], entry["style"] = font.getname()
+        bbox = font.getbbox("A")
+        entry["valid"] = bbox[2] > bbox[0]
+    except Exception:
+        pass
+    return entry
 
-            if not fonts:
-                font_dirs = []
-                if sys.platform == "darwin":
-                    font_dirs = [
-                        Path("/System/Library/Fonts"),
-                        Path("/Library/Fonts"),
-                        Path.home() / "Library/Fonts",
-                    ]
-                else:
-                    font_dirs = [
-                        Path("/usr/share/fonts"),
-                        Path("/usr/local/share/fonts"),
-                        Path.home() / ".fonts",
-                        Path.home() / ".local/share/fonts",
-                    ]
 
-                for font_dir in font_dirs:
-                    if font_dir.exists():
-                        for ext in ["*.ttf", "*.otf", "*.TTF", "*.OTF"]:
-                            fonts.update(font_dir.rglob(ext))
+def build_font_catalog():
+    """Scan and validate every font file (slow: opens each one)."""
+    fonts = {}
+    for font_path in _font_files():
+        path = Path(font_path)
+        if path.suffix.lower() not in ['.ttf', '.otf']:
+            continue
+        name = path.stem.replace('-', ' ').replace('_', ' ')
+        # The first file for a name wins, matching the sorted scan order
+        if name not in fonts or not fonts[name]["valid"]:
+            fonts[name] = _catalog_entry(path)
+
+    # Directories holding fonts plus every scanned font directory: adding or removing a file changes one of them
+    dirs = {Path(entry["path"]).parent for entry in fonts.values()}
+    for root in _font_dirs():
+        dirs.add(root)
+        if root.exists():
+            dirs.update(p for p in root.rglob("*") if p.is_dir())
+    return {"version": CATALOG_VERSION, "built": time.time(), "dirs": _dir_mtimes(sorted(dirs)), "fonts": fonts}
+
+
+def _load_catalog():
+    try:
+        with open(catalog_path(), "r", encoding="utf-8") as f:
+            catalog = json.load(f)
+        if isinstance(catalog, dict) and catalog.get("version") == CATALOG_VERSION:
+            return catalog
+    except (OSError, ValueError):
+        pass
+    return None
+
 
+def _save_catalog(catalog):
+    path = catalog_path()
+    payload = json.dumps(catalog, ensure_ascii=False, indent=1)
+
+    # Temp sibling + rename so readers never see a partial catalog; kept local so this module
+    # has no package dependencies (benchmarks import common.* as a top-level package)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(payload)
+        os.replace(tmp, path)
+    except OSError as e:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        _warn("Font catalog not saved", {"Path": str(path), "Error": str(e)})
+
+
+def _is_stale(catalog):
+    return _dir_mtimes(catalog["dirs"]) != catalog["dirs"]
+
+
+def _refresh_catalog():
+    global _CATALOG
+    try:
+        catalog = _CATALOG or _load_catalog()
+        if catalog is not None:
+            # Serve the saved catalog right away, even if a rebuild follows
+            with _CATALOG_LOCK:
+                _CATALOG = catalog
+        if catalog is None or _is_stale(catalog):
+            catalog = build_font_catalog()
+            with _CATALOG_LOCK:
+                _CATALOG = catalog
+            _save_catalog(catalog)
     except Exception as e:
-        print(f"⚠️ Font detection error: {e}")
+        _warn("Font detection error", {"Error": str(e)})
 
-    working_fonts = set()
-    test_text = "A"
 
-    for font_path in fonts:
-        path = Path(font_path)
-        if path.exists() and path.suffix.lower() in ['.ttf', '.otf']:
-            try:
-                font = ImageFont.truetype(str(path), 12)
-                bbox = font.getbbox(test_text)
-                if bbox[2] > bbox[0]:
-                    name = path.stem.replace('-', ' ').replace('_', ' ')
-                    working_fonts.add(name)
-            except Exception:
-                pass
+def start_font_catalog():
+    """Load or rebuild the catalog in a background thread (no-op while one is running or after a recent check)."""
+    global _BUILD_THREAD, _CHECKED_AT
+    with _CATALOG_LOCK:
+        now = time.monotonic()
+        if (_BUILD_THREAD is not None and _BUILD_THREAD.is_alive()) or now - _CHECKED_AT < RECHECK_SECONDS:
+            return _BUILD_THREAD
+        _CHECKED_AT = now
+        _BUILD_THREAD = threading.Thread(target=_refresh_catalog, name="stalker-font-catalog", daemon=True)
+        _BUILD_THREAD.start()
+        return _BUILD_THREAD
 
-    fallbacks = {"Arial", "DejaVuSans", "LiberationSans", "NotoSans"}
-    working_fonts.update(fallbacks)
 
-    return sorted(working_fonts) if working_fonts else ["Arial", "DejaVuSans"]
+def font_catalog():
+    """Last finished catalog, or None if the first build is still running. Never waits."""
+    start_font_catalog()
+    return _CATALOG
 
 
-def find_font_path(font_name):
-    """Find the file path for a given font name."""
+def get_system_font_names():
+    """
+    Get list of available system fonts from the catalog without waiting: the fallback names plus
+    the last finished (or saved) catalog. Fonts found by a first scan still running show up on the
+    next request; TextWatermark.VALIDATE_INPUTS accepts names that are not listed yet.
+    """
+    # The saved file covers the moment before the background thread has published it
+    catalog = font_catalog() or _load_catalog()
+    working_fonts = set(FALLBACK_FONTS)
+    if catalog is not None:
+        working_fonts.update(name for name, entry in catalog["fonts"].items() if entry["valid"])
+    return sorted(working_fonts)
+
+
+# Regular faces win when several catalog entries share a family
+_REGULAR_STYLES = ("regular", "book", "normal", "roman", "medium")
+FALLBACK_FILES = ("DejaVuSans.ttf", "Arial.ttf", "LiberationSans-Regular.ttf", "NotoSans-Regular.ttf")
+
+# font name -> resolved path (or None); reset whenever a new catalog is published
+_PATHS = {}
+_PATHS_CATALOG = None
+_PATH_STATS = {"hits": 0, "misses": 0}
+
+
+def _catalog_lookup(catalog, font_name):
+    """Catalog path for a font name, matched like fontconfig's :family= query."""
+    fonts = catalog["fonts"]
+    entry = fonts.get(font_name)
+    if entry and entry["valid"]:
+        return entry["path"]
+    wanted = font_name.lower()
+    compact = wanted.replace(" ", "")
+    matches = [e for n, e in fonts.items()
+               if e["valid"] and (n.lower() == wanted or n.lower().replace(" ", "") == compact
+                                  or (e["family"] or "").lower() == wanted)]
+    if not matches:
+        return None
+    matches.sort(key=lambda e: (e["style"] or "").lower() not in _REGULAR_STYLES)
+    return matches[0]["path"]
+
+
+def _search_font_path(font_name):
+    """Slow lookup through fontconfig and the font directories, used until the catalog exists."""
     font_path = None
 
     try:
-        if sys.platform == "win32":
-            base_dirs = [Path(os.environ.get("WINDIR", "C:\\Windows")) / "Fonts"]
-        else:
+        if sys.platform != "win32":
             try:
                 result = subprocess.run(
                     ["fc-list", f":family={font_name}", "--format=%{file}\\n"],
@@ -111,24 +285,7 @@ def find_font_path(font_name):
                 pass
 
         if not font_path:
-            search_dirs = []
-            if sys.platform == "win32":
-                search_dirs = [Path(os.environ.get("WINDIR", "C:\\Windows")) / "Fonts"]
-            elif sys.platform == "darwin":
-                search_dirs = [
-                    Path("/System/Library/Fonts"),
-                    Path("/Library/Fonts"),
-                    Path.home() / "Library/Fonts",
-                ]
-            else:
-                search_dirs = [
-                    Path("/usr/share/fonts"),
-                    Path("/usr/local/share/fonts"),
-                    Path.home() / ".fonts",
-                    Path.home() / ".local/share/fonts",
-                ]
-
-            for search_dir in search_dirs:
+            for search_dir in _font_dirs():
                 if search_dir.exists():
                     candidates = [
                         search_dir / f"{font_name}.ttf",
@@ -149,30 +306,71 @@ def find_font_path(font_name):
     return font_path
 
 
+def find_font_path(font_name):
+    """Find the file path for a given font name (memoized per catalog, no subprocess on repeats)."""
+    global _PATHS, _PATHS_CATALOG
+    catalog = font_catalog()
+    with _CATALOG_LOCK:
+        if catalog is not _PATHS_CATALOG:
+            _PATHS, _PATHS_CATALOG = {}, catalog
+        if font_name in _PATHS:
+            _PATH_STATS["hits"] += 1
+            return _PATHS[font_name]
+        _PATH_STATS["misses"] += 1
+
+    font_path = _catalog_lookup(catalog, font_name) if catalog is not None else None
+    if font_path is None:
+        font_path = _search_font_path(font_name)
+    with _CATALOG_LOCK:
+        if catalog is _PATHS_CATALOG:
+            _PATHS[font_name] = font_path
+    return font_path
+
+
+@functools.lru_cache(maxsize=64)
+def _truetype(path, font_size):
+    """Loaded FreeType face, shared by every caller asking for the same file and size."""
+    return ImageFont.truetype(path, font_size)
+
+
+@functools.lru_cache(maxsize=1)
+def _fallback_file():
+    """First fallback font PIL can open, or None."""
+    for fallback in FALLBACK_FILES:
+        try:
+            ImageFont.truetype(fallback, 12)
+            return fallback
+        except Exception:
+            continue
+    return None
+
+
 def load_font(font_name, font_size):
     """Load a font by name with automatic fallback."""
-    font = None
     font_path = find_font_path(font_name)
 
-    if font_path and Path(font_path).exists():
+    if font_path:
         try:
-            font = ImageFont.truetype(font_path, font_size)
-            return font
+            return _truetype(font_path, font_size)
         except Exception as e:
             print(f"Failed to load font {font_path}: {e}")
 
-    fallback_fonts = [
-        "DejaVuSans.ttf",
-        "Arial.ttf",
-        "LiberationSans-Regular.ttf",
-        "NotoSans-Regular.ttf"
-    ]
+    fallback = _fallback_file()
+    if fallback is not None:
+        return _truetype(fallback, font_size)
+    return ImageFont.load_default()
 
-    for fallback in fallback_fonts:
-        try:
-            font = ImageFont.truetype(fallback, font_size)
-            return font
-        except:
-            continue
 
-    return ImageFont.load_default()
\ No newline at end of file
+def font_cache_stats():
+    """Hit counts of the font name -> path memo and the loaded face LRU, for logging."""
+    faces = _truetype.cache_info()
+
+    def rate(hits, misses):
+        total = hits + misses
+        return f"{hits}/{total} ({hits / total * 100:.0f}%)" if total else "0/0"
+
+    return {
+        "Font Path Hits": rate(_PATH_STATS["hits"], _PATH_STATS["misses"]),
+        "Font Face Hits": rate(faces.hits, faces.misses),
+        "Cached Faces": f"{faces.currsize}/{faces.maxsize}",
+    }
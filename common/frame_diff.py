@@ -0,0 +1,130 @@
+import numpy as np
+import torch
+
+# ─── Static / Duplicate Frame Detection ─────────────────────────────────
+# Mean absolute difference between frames of an IMAGE batch (values 0-1),
+# computed in small chunks on the batch's own device. A frame is a duplicate
+# when it is within `threshold` of the last frame that was kept, so slow
+# fades never collapse into a freeze.
+
+
+def consecutive_diffs(images, chunk_frames=8):
+    """Mean abs diff between each frame and the next; numpy array of length B-1."""
+    total = images.shape[0]
+    diffs = []
+    for start in range(0, total - 1, chunk_frames):
+        end = min(start + chunk_frames, total - 1)
+        delta = images[start + 1:end + 1, ..., :3] - images[start:end, ..., :3]
+        diffs.append(delta.abs().mean(dim=(1, 2, 3)).float().cpu())
+    return torch.cat(diffs).numpy() if diffs else np.zeros(0, dtype=np.float32)
+
+
+def _diffs_to(images, first, last, anchor, chunk_frames):
+    reference = images[anchor:anchor + 1, ..., :3]
+    out = []
+    for start in range(first, last, chunk_frames):
+        end = min(start + chunk_frames, last)
+        out.append((images[start:end, ..., :3] - reference).abs().mean(dim=(1, 2, 3)).float().cpu())
+    return torch.cat(out).numpy()
+
+
+def duplicate_mask(images, threshold, chunk_frames=8):
+    """
+    Keep mask for a batch: a frame is dropped when its mean abs diff to the last kept
+    frame is <= threshold. The first and last frames are always kept so the encoded
+    video starts and ends where the batch does.
+    Returns:
+        (keep bool array [B], consecutive diffs [B-1])
+    """
+    total = images.shape[0]
+    keep = np.ones(total, dtype=bool)
+    diffs = consecutive_diffs(images, chunk_frames)
+    # Vectorized pass finds candidate runs; each run is then checked against its anchor
+    candidate = np.concatenate(([False], diffs <= threshold))
+    i = 1
+    while i < total:
+        if not candidate[i]:
+            i += 1
+            continue
+        run_end = i
+        while run_end < total and candidate[run_end]:
+            run_end += 1
+        anchor, start = i - 1, i
+        while start < run_end:
+            far = np.nonzero(_diffs_to(images, start, run_end, anchor, chunk_frames) > threshold)[0]
+            stop = start + int(far[0]) if len(far) else run_end
+            keep[start:stop] = False
+            if stop < run_end:
+                anchor, start = stop, stop + 1
+            else:
+                start = run_end
+        i = run_end
+    keep[-1] = True
+    return keep, diffs
+
+
+def dropped_runs(keep):
+    """Inclusive (first, last) index ranges of dropped frames."""
+    runs, start = [], None
+    for index, kept in enumerate(keep):
+        if not kept and start is None:
+            start = index
+        elif kept and start is not None:
+            runs.append((start, index - 1))
+            start = None
+    if start is not None:
+        runs.append((start, len(keep) - 1))
+    return runs
+
+
+def vfr_filter(keep):
+    """
+    Filter chain giving every kept frame (N counts piped frames) the timestamp of its
+    original index, so the encoded video keeps the batch's timing. Pair it with
+    `vfr_duration_bsf` so the last frame keeps its length.
+    """
+    terms = ["N"]
+    kept_index = np.cumsum(keep) - 1
+    for first, last in dropped_runs(keep):
+        # Frames piped after this run shift by its length
+        if last + 1 < len(keep):
+            terms.append(f"gte(N,{int(kept_index[last + 1])})*{last - first + 1}")
+    return "setpts='(" + "+".join(terms) + ")/(FRAME_RATE*TB)'"
+
+
+def vfr_duration_bsf(fps):
+    """
+    Bitstream filter giving every packet of a `vfr_filter` stream one frame of duration.
+    Muxers take the track length from the last packet's duration, which encoders leave
+    at 0 or a fraction of a frame after the timestamps were rewritten, so MP4/MOV edit
+    lists would otherwise cut the final frame. The last frame is always kept, so one
+    frame is its true length; the other frames are timed by their successors.
+    """
+    return f"setts=pts=PTS:dts=DTS:duration=1/({fps}*TB)"
+
+
+def timecodes_v2(keep, fps):
+    """Matroska timestamp format v2 text: one millisecond timestamp per kept frame."""
+    lines = ["# timestamp format v2"]
+    lines += [f"{index * 1000.0 / fps:.3f}" for index in np.nonzero(keep)[0]]
+    return "\n".join(lines) + "\n"
+
+
+class FrameSelection:
+    """
+    Kept frames of a batch, indexable like the IMAGE tensor by `feed_frames`.
+    Slices gather only the requested frames, so the subset is never copied as a whole.
+    """
+
+    def __init__(self, images, keep):
+        self.images = images
+        self.index = torch.as_tensor(np.nonzero(keep)[0], device=images.device)
+        self.shape = (len(self.index),) + tuple(images.shape[1:])
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            return self[key[0]][key[1:]]
+        return self.images[self.index[key]]
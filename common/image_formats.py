@@ -0,0 +1,173 @@
+import json
+import re
+from pathlib import Path
+
+from PIL import Image, PngImagePlugin
+
+# Optional: encoders shipped as separate Pillow plugins
+try:
+    import pillow_avif  # noqa: F401  (AVIF for Pillow < 11.2; newer builds have it built in)
+except ImportError:
+    pass
+
+try:
+    import pillow_jxl  # noqa: F401
+except ImportError:
+    pass
+
+# ─── Output Format Table ────────────────────────────────────────────────
+# name -> (Pillow format, extension, supports alpha)
+FORMATS = {
+    "png": ("PNG", ".png", True),
+    "webp_lossless": ("WEBP", ".webp", True),
+    "webp": ("WEBP", ".webp", True),
+    "jpeg": ("JPEG", ".jpg", False),
+    "avif": ("AVIF", ".avif", True),
+    "jxl": ("JXL", ".jxl", True),
+}
+
+# EXIF IFD0 string tags used for text metadata, following ComfyUI's own convention
+# for WebP/AVIF: "key:json" values written downward from 0x010F (Make) to 0x010D
+# (DocumentName). Below that are FillOrder (a SHORT) and undefined tags, so further
+# items go to the metadata sidecar.
+EXIF_TEXT_TAGS = (0x010F, 0x010E, 0x010D)
+
+# JPEG APP1 segments are limited to 64 KB
+JPEG_EXIF_LIMIT = 65533
+
+_EXIF_TEXT_PATTERN = re.compile(r"^([A-Za-z_][\w]*):(.*)$", re.DOTALL)
+
+# Text metadata that does not fit the EXIF budget is stored next to the image
+# as prefix_00001.metadata.json ({key: value string}) and merged back on load
+METADATA_SIDECAR = ".metadata.json"
+
+
+def is_format_available(name):
+    """True if the local Pillow build can encode `name` (see FORMATS)."""
+    Image.init()
+    return FORMATS[name][0] in Image.SAVE
+
+
+def available_formats():
+    return [name for name in FORMATS if is_format_available(name)]
+
+
+def _pack_exif(items):
+    exif = Image.Exif()
+    for tag, (key, value) in zip(EXIF_TEXT_TAGS, items):
+        exif[tag] = f"{key}:{value}"
+    return exif.tobytes()
+
+
+def build_exif(text_items, limit=None):
+    """
+    Pack text metadata into EXIF IFD0 as "key:value" strings.
+    Args:
+        text_items: Ordered list of (key, value) pairs, most important first
+        limit: Optional byte budget; items that would overflow it are skipped
+    Returns:
+        (exif_bytes or None, list of dropped keys)
+    """
+    kept, dropped = [], []
+    for item in text_items:
+        if len(kept) < len(EXIF_TEXT_TAGS) and (limit is None or len(_pack_exif(kept + [item])) <= limit):
+            kept.append(item)
+        else:
+            dropped.append(item[0])
+    return (_pack_exif(kept) if kept else None), dropped
+
+
+def read_exif_text(img):
+    """Recover "key:value" text metadata written by `build_exif`."""
+    metadata = {}
+    try:
+        exif = img.getexif()
+    except Exception:
+        return metadata
+    for tag in EXIF_TEXT_TAGS:
+        value = exif.get(tag)
+        if isinstance(value, bytes):
+            value = value.decode("utf-8", "replace")
+        if isinstance(value, str):
+            match = _EXIF_TEXT_PATTERN.match(value)
+            if match:
+                metadata[match.group(1)] = match.group(2)
+    return metadata
+
+
+def metadata_sidecar_path(image_path):
+    """`dir/prefix_00001.jpg` -> `dir/prefix_00001.metadata.json`."""
+    return Path(image_path).with_suffix(METADATA_SIDECAR)
+
+
+def read_metadata_sidecar(image_path):
+    """Text metadata moved out of an image's EXIF by the saver, or {} if there is none."""
+    try:
+        with open(metadata_sidecar_path(image_path), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return {k: v for k, v in data.items() if isinstance(v, str)} if isinstance(data, dict) else {}
+
+
+def exif_text_items(save_workflow, extra_pnginfo, metadata_dict):
+    """Text metadata in EXIF priority order: comfy_metadata first, then workflow/prompt entries."""
+    items = []
+    if metadata_dict:
+        items.append(("comfy_metadata", json.dumps(metadata_dict, ensure_ascii=True, separators=(',', ':'))))
+    if save_workflow and extra_pnginfo:
+        for k, v in extra_pnginfo.items():
+            items.append((k, json.dumps(v)))
+    return items
+
+
+def build_pnginfo(save_workflow, extra_pnginfo, metadata_dict):
+    """
+    Build PNG text chunks for a whole batch. PngInfo compresses zTXt/iTXt payloads
+    when they are added, so the result can be shared by every frame (and thread).
+    """
+    pnginfo = PngImagePlugin.PngInfo()
+    if save_workflow and extra_pnginfo:
+        for k, v in extra_pnginfo.items():
+            pnginfo.add_text(k, json.dumps(v))
+
+    if metadata_dict:
+        meta_str = json.dumps(metadata_dict, ensure_ascii=False, separators=(',', ':'))
+        key = "comfy_metadata"
+        if len(meta_str) > 1024:
+            # zTXt (or compressed iTXt when the text is not Latin-1)
+            pnginfo.add_text(key, meta_str, zip=True)
+        elif any(ord(c) > 127 for c in meta_str):
+            pnginfo.add_itxt(key, meta_str, lang="", tkey="")
+        else:
+            pnginfo.add_text(key, meta_str)
+    return pnginfo
+
+
+def save_image(img, path, file_format, compression_level=0, quality=90, pnginfo=None, exif=None):
+    """
+    Encode a PIL image to `path` in one of the FORMATS.
+    Args:
+        compression_level: 0-9 effort for lossless formats (zlib level, WebP method)
+        quality: 1-100 for lossy formats
+        pnginfo: PngInfo for PNG output
+        exif: EXIF bytes for every other format
+    """
+    pil_format, _, has_alpha = FORMATS[file_format]
+    if not has_alpha and img.mode != "RGB":
+        img = img.convert("RGB")
+
+    if file_format == "png":
+        img.save(path, format=pil_format, pnginfo=pnginfo, compress_level=compression_level)
+        return
+
+    params = {"exif": exif} if exif else {}
+    if file_format == "webp_lossless":
+        params.update(lossless=True, method=round(compression_level * 6 / 9))
+    elif file_format == "webp":
+        params.update(quality=quality, method=4)
+    elif file_format == "jpeg":
+        params.update(quality=quality, optimize=False)
+    else:
+        params.update(quality=quality)
+    img.save(path, format=pil_format, **params)
@@ -1,7 +1,73 @@
+import warnings
+
 import torch
 from PIL import Image
 import numpy as np
 
+# PIL modes whose raw buffer is one uint8 per channel
+_UINT8_MODES = {"L": 1, "LA": 2, "RGB": 3, "RGBA": 4}
+
+# Frames converted per step in batch conversions; bounds the float temporary
+_CHUNK_FRAMES = 8
+
+
+def tensor_to_uint8(images, chunk_size=_CHUNK_FRAMES):
+    """
+    Convert float images in [0, 1] to a uint8 CPU tensor (values truncated, like `astype(np.uint8)`).
+    Args:
+        images: Torch tensor (H, W, C) or (B, H, W, C), any device
+        chunk_size: Frames converted per step (bounds the float temporary)
+    Returns:
+        uint8 CPU tensor with the same shape
+    """
+    images = images.detach()
+
+    if images.device.type != "cpu" or images.dtype not in (torch.float32, torch.float64):
+        # Scale on the source device: 4x less data crosses to the host
+        if images.dim() < 4:
+            return torch.mul(images, 255.0).clamp_(0, 255).to(torch.uint8).cpu()
+        out = torch.empty(images.shape, dtype=torch.uint8)
+        for start in range(0, images.shape[0], chunk_size):
+            chunk = images[start:start + chunk_size]
+            out[start:start + chunk.shape[0]] = torch.mul(chunk, 255.0).clamp_(0, 255).to(torch.uint8).cpu()
+        return out
+
+    # CPU: operate on NumPy views of the torch storage, one float temporary per chunk
+    src = images.numpy()
+    out = np.empty(src.shape, dtype=np.uint8)
+    if src.ndim < 4:
+        src, dst = src[None], out[None]
+    else:
+        dst = out
+    for start in range(0, src.shape[0], chunk_size):
+        tmp = np.multiply(src[start:start + chunk_size], 255.0)
+        np.clip(tmp, 0, 255, out=tmp)
+        dst[start:start + chunk_size] = tmp
+    return torch.from_numpy(out)
+
+
+def pil_to_uint8(image):
+    """
+    View a PIL image's pixel buffer as a uint8 tensor (one buffer copy, no float temporaries).
+    Args:
+        image: PIL Image in L, LA, RGB or RGBA mode
+    Returns:
+        uint8 tensor (H, W, C), read-only storage
+    """
+    channels = _UINT8_MODES[image.mode]
+    with warnings.catch_warnings():
+        # tobytes() is immutable; callers never write to the returned view
+        warnings.simplefilter("ignore", UserWarning)
+        flat = torch.frombuffer(image.tobytes(), dtype=torch.uint8)
+    return flat.view(image.height, image.width, channels)
+
+
+def uint8_to_float(tensor):
+    """Scale a uint8 tensor to float32 in [0, 1] with a single allocation."""
+    scaled = tensor.numpy().astype(np.float32)
+    np.divide(scaled, 255.0, out=scaled)
+    return torch.from_numpy(scaled)
+
 
 def tensor2pil(image):
     """
@@ -11,7 +77,7 @@ def tensor2pil(image):
     Returns:
         PIL Image (RGB or RGBA)
     """
-    return Image.fromarray(np.clip(255. * image.cpu().numpy().squeeze(), 0, 255).astype(np.uint8))
+    return Image.fromarray(tensor_to_uint8(image).numpy().squeeze())
 
 
 def pil2tensor(image):
@@ -22,4 +88,39 @@ def pil2tensor(image):
     Returns:
         Torch tensor (B, H, W, C) in range [0, 1]
     """
-    return torch.from_numpy(np.array(image).astype(np.float32) / 255.0).unsqueeze(0)
\ No newline at end of file
+    if image.mode not in _UINT8_MODES:
+        return torch.from_numpy(np.array(image).astype(np.float32) / 255.0).unsqueeze(0)
+    tensor = uint8_to_float(pil_to_uint8(image))
+    if tensor.shape[-1] == 1:
+        tensor = tensor.squeeze(-1)
+    return tensor.unsqueeze(0)
+
+
+def pil2mask(image):
+    """
+    Convert a PIL image's alpha channel to a ComfyUI mask.
+    Args:
+        image: PIL Image with an 'A' band
+    Returns:
+        Torch tensor (1, H, W), 1.0 where transparent
+    """
+    mask = uint8_to_float(pil_to_uint8(image.getchannel("A")).squeeze(-1))
+    np.subtract(1.0, mask.numpy(), out=mask.numpy())
+    return mask.unsqueeze(0)
+
+
+def pils2tensor(images):
+    """
+    Convert same-size PIL images into one batch tensor.
+    The output is allocated once and filled in place; no per-image float copies.
+    Args:
+        images: Sequence of PIL Images with identical size and mode
+    Returns:
+        Torch tensor (B, H, W, C) in range [0, 1]
+    """
+    first = pil_to_uint8(images[0]).numpy()
+    out = np.empty((len(images),) + first.shape, dtype=np.float32)
+    for i, image in enumerate(images):
+        out[i] = first if i == 0 else pil_to_uint8(image).numpy()
+    np.divide(out, 255.0, out=out)
+    return torch.from_numpy(out)
@@ -0,0 +1,135 @@
+import os
+import re
+import threading
+import time
+
+# ─── Sequential File Numbering ──────────────────────────────────────────
+# Numbers are claimed by creating a hidden, empty lock file (.prefix_00042.reserved)
+# with O_CREAT | O_EXCL, which is atomic across threads and processes (including
+# most network filesystems). Directory readers skip dot files and never match the
+# lock's extension, so a reservation is never mistaken for a corrupt output file.
+# Writers release the lock once the real file is in place.
+# One sequence is kept per (directory, prefix) across every extension, including
+# sidecars and ranged names such as prefix_00004-00007.jsonl, so files written in
+# different formats never reuse a number. The directory is scanned once for the
+# highest number; afterwards the cached high-water mark is confirmed by a stat of
+# the last issued names (its lock or its files), and a rescan only happens when
+# those are gone (deleted) or a claim collides with another writer.
+# Locks older than STALE_LOCK_SECONDS (left by a crashed process) are removed by scans.
+
+_CACHE = {}
+_LOCK = threading.Lock()
+
+LOCK_SUFFIX = ".reserved"
+STALE_LOCK_SECONDS = 3600
+# Rescans allowed in one reservation before giving up on a contended directory
+_MAX_RESCANS = 8
+
+
+class _Counter:
+    __slots__ = ("next", "last_paths")
+
+    def __init__(self, next_number):
+        self.next = next_number
+        # Lock and target paths of the last issued number
+        self.last_paths = ()
+
+    def confirmed(self):
+        return not self.last_paths or any(os.path.exists(path) for path in self.last_paths)
+
+
+def numbered_name(prefix, number, extension, digits=5):
+    """Build `prefix_00042.ext`."""
+    if not extension.startswith("."): extension = "." + extension
+    return f"{prefix}_{number:0{digits}d}{extension}"
+
+
+def _lock_path(directory, prefix, number, digits):
+    return os.path.join(directory, "." + numbered_name(prefix, number, LOCK_SUFFIX, digits))
+
+
+def _scan_max(directory, prefix):
+    # prefix_00042.ext, prefix_00040-00042.ext (ranges) and our hidden locks
+    pattern = re.compile(rf"^\.?{re.escape(prefix)}_(\d+)(?:-(\d+))?\.[^.]+$", re.IGNORECASE)
+    stale_before = time.time() - STALE_LOCK_SECONDS
+    max_num = 0
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                match = pattern.match(entry.name)
+                if not match: continue
+                if entry.name.startswith(".") and entry.name.endswith(LOCK_SUFFIX):
+                    try:
+                        if entry.stat().st_mtime < stale_before:
+                            os.unlink(entry.path)
+                            continue
+                    except FileNotFoundError:
+                        continue
+                max_num = max(max_num, int(match.group(2) or match.group(1)))
+    except FileNotFoundError:
+        pass
+    return max_num
+
+
+def reserve_numbers(directory, prefix, extension, count=1, digits=5, sidecars=()):
+    """
+    Claim the next `count` free numbers for `prefix_NNNNN.ext` in `directory`.
+    A hidden lock file is created for every claimed number; call `release_numbers`
+    once the files are written (or failed).
+    Args:
+        directory: Target directory (must exist)
+        prefix: Filename prefix
+        extension: File extension with or without the leading dot
+        count: How many numbers to claim
+        digits: Zero-padding width
+        sidecars: Further extensions written under the same number (e.g. ".txt" captions)
+    Returns:
+        List of claimed numbers in ascending order (consecutive unless another writer interleaved)
+    """
+    extensions = [e if e.startswith(".") else "." + e for e in (extension,) + tuple(sidecars)]
+    directory = os.path.realpath(str(directory))
+    key = (directory, prefix)
+
+    with _LOCK:
+        counter = _CACHE.get(key)
+        if counter is None or not counter.confirmed():
+            # First use, or our last file was deleted: continue after the highest number on disk
+            counter = _Counter(_scan_max(directory, prefix) + 1)
+            _CACHE[key] = counter
+
+        claimed = []
+        number = counter.next
+        rescans = 0
+        while len(claimed) < count:
+            lock = _lock_path(directory, prefix, number, digits)
+            targets = [os.path.join(directory, numbered_name(prefix, number, ext, digits)) for ext in extensions]
+            try:
+                os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644))
+            except FileExistsError:
+                pass
+            else:
+                if not any(os.path.exists(path) for path in targets):
+                    claimed.append(number)
+                    counter.last_paths = (lock,) + tuple(targets)
+                    number += 1
+                    continue
+                os.unlink(lock)
+            # Another node or process wrote here; jump past whatever is on disk now
+            rescans += 1
+            if rescans > _MAX_RESCANS:
+                release_numbers(directory, prefix, claimed, digits)
+                raise RuntimeError(f"Could not reserve file numbers in contended directory: {directory}")
+            number = max(number + 1, _scan_max(directory, prefix) + 1)
+
+        counter.next = number
+        return claimed
+
+
+def release_numbers(directory, prefix, numbers, digits=5):
+    """Remove the lock files of reserved numbers whose files are written (or abandoned)."""
+    directory = os.path.realpath(str(directory))
+    for number in numbers:
+        try:
+            os.unlink(_lock_path(directory, prefix, number, digits))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,139 @@
+import functools
+import math
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+# ─── Perceptual Hashes ──────────────────────────────────────────────────
+# 64-bit aHash / dHash / pHash computed for a whole batch at once on the
+# tensor's device. Hashes are Python ints; similarity is Hamming distance.
+
+HASH_TYPES = ("phash", "dhash", "ahash")
+
+# Thumbnail (height, width) each hash is computed from
+THUMB_SIZES = {"ahash": (8, 8), "dhash": (8, 9), "phash": (32, 32)}
+
+_LUMA = (0.299, 0.587, 0.114)
+
+# Frames reduced per step; bounds the full-resolution grayscale temporary
+_CHUNK_FRAMES = 16
+
+
+@functools.lru_cache(maxsize=8)
+def _dct_matrix(n, device, dtype):
+    """Orthonormal DCT-II basis: coefficients = D @ X @ D.T"""
+    k = torch.arange(n, dtype=torch.float64).unsqueeze(1)
+    i = torch.arange(n, dtype=torch.float64).unsqueeze(0)
+    d = torch.cos(math.pi * (2 * i + 1) * k / (2 * n)) * math.sqrt(2.0 / n)
+    d[0] /= math.sqrt(2.0)
+    return d.to(device=device, dtype=dtype)
+
+
+def thumbnails(images, hash_type, chunk_size=_CHUNK_FRAMES):
+    """
+    Reduce an IMAGE batch to grayscale hash thumbnails.
+    Args:
+        images: Tensor (B, H, W, C) in [0, 1]
+    Returns:
+        Tensor (B, h, w) float32 on the source device
+    """
+    size = THUMB_SIZES[hash_type]
+    luma = torch.tensor(_LUMA, device=images.device, dtype=torch.float32)
+    out = []
+    for start in range(0, images.shape[0], chunk_size):
+        chunk = images[start:start + chunk_size, :, :, :3].float()
+        gray = (chunk @ luma) if chunk.shape[-1] == 3 else chunk.mean(dim=-1)
+        out.append(F.interpolate(gray.unsqueeze(1), size=size, mode="area").squeeze(1))
+    return torch.cat(out, dim=0)
+
+
+def hash_thumbnails(thumbs, hash_type):
+    """
+    Hash grayscale thumbnails of shape THUMB_SIZES[hash_type].
+    Args:
+        thumbs: Tensor (B, h, w)
+    Returns:
+        List of 64-bit ints
+    """
+    thumbs = thumbs.float()
+    if hash_type == "ahash":
+        flat = thumbs.flatten(1)
+        bits = flat > flat.mean(dim=1, keepdim=True)
+    elif hash_type == "dhash":
+        bits = (thumbs[:, :, 1:] > thumbs[:, :, :-1]).flatten(1)
+    elif hash_type == "phash":
+        d = _dct_matrix(thumbs.shape[-1], thumbs.device, thumbs.dtype)
+        low = (d @ thumbs @ d.T)[:, :8, :8].flatten(1)
+        bits = low > low.median(dim=1, keepdim=True).values
+    else:
+        raise ValueError(f"Unknown hash type: {hash_type}")
+    packed = np.packbits(bits.cpu().numpy(), axis=1)
+    return [int.from_bytes(row.tobytes(), "big") for row in packed]
+
+
+def image_hashes(images, hash_type):
+    """Perceptual hashes for every frame of an IMAGE batch."""
+    return hash_thumbnails(thumbnails(images, hash_type), hash_type)
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class BKTree:
+    """Burkhard-Keller tree over Hamming distance for radius queries on hashes."""
+
+    def __init__(self):
+        self._root = None
+
+    def add(self, value, item):
+        if self._root is None:
+            self._root = (value, item, {})
+            return
+        node = self._root
+        while True:
+            dist = hamming(value, node[0])
+            child = node[2].get(dist)
+            if child is None:
+                node[2][dist] = (value, item, {})
+                return
+            node = child
+
+    def search(self, value, radius):
+        """All (distance, item) within `radius` of `value`, nearest first."""
+        if self._root is None:
+            return []
+        found, stack = [], [self._root]
+        while stack:
+            node_value, item, children = stack.pop()
+            dist = hamming(value, node_value)
+            if dist <= radius:
+                found.append((dist, item))
+            # Triangle inequality: only subtrees at distance dist ± radius can match
+            for d in range(max(0, dist - radius), dist + radius + 1):
+                child = children.get(d)
+                if child is not None:
+                    stack.append(child)
+        found.sort(key=lambda x: x[0])
+        return found
+
+
+def cluster_hashes(hashes, threshold):
+    """
+    Greedy clustering in input order: each hash joins the nearest earlier kept hash
+    within `threshold`, otherwise it is kept and starts a new cluster.
+    Returns:
+        List where entry i is (kept index, distance); kept items map to (i, 0)
+    """
+    tree = BKTree()
+    assignment = []
+    for i, value in enumerate(hashes):
+        matches = tree.search(value, threshold)
+        if matches:
+            dist, keeper = min(matches)
+            assignment.append((keeper, dist))
+        else:
+            tree.add(value, i)
+            assignment.append((i, 0))
+    return assignment
@@ -0,0 +1,104 @@
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+from server import PromptServer
+
+from ..config.config_manager import ConfigManager
+from .logger import LogEntry, log
+
+# ─── Blocking Work Executor ─────────────────────────────────────────────
+# All HTTP routes registered by this extension push file I/O and parsing
+# into this pool so ComfyUI's event loop (websockets, queue handling) never
+# waits on disk. The pool size is the concurrency cap.
+_EXECUTOR = None
+_EXECUTOR_LOCK = threading.Lock()
+
+# key -> asyncio.Future of the job currently running for that key
+_INFLIGHT = {}
+
+# route name -> latency counters
+_METRICS = {}
+
+
+def _get_executor():
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        with _EXECUTOR_LOCK:
+            if _EXECUTOR is None:
+                workers = max(1, int(ConfigManager().get("server.io_workers", 2)))
+                _EXECUTOR = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="stalker-io")
+    return _EXECUTOR
+
+
+async def run_blocking(key, func, *args, **kwargs):
+    """
+    Run a blocking callable in the extension executor.
+    Concurrent calls sharing the same key are coalesced into a single job
+    and all receive its result (or exception).
+    """
+    loop = asyncio.get_running_loop()
+
+    if key is not None and key in _INFLIGHT:
+        return await asyncio.shield(_INFLIGHT[key])
+
+    future = loop.run_in_executor(_get_executor(), functools.partial(func, *args, **kwargs))
+    if key is not None:
+        _INFLIGHT[key] = future
+        future.add_done_callback(lambda _: _INFLIGHT.pop(key, None))
+    return await asyncio.shield(future)
+
+
+def _record(route, elapsed, ok):
+    stats = _METRICS.setdefault(route, {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0})
+    ms = elapsed * 1000.0
+    stats["count"] += 1
+    stats["errors"] += 0 if ok else 1
+    stats["total_ms"] += ms
+    stats["max_ms"] = max(stats["max_ms"], ms)
+    stats["last_ms"] = ms
+    return stats
+
+
+def get_route_metrics():
+    """Snapshot of per-route latency counters."""
+    return {
+        route: {
+            "count": s["count"],
+            "errors": s["errors"],
+            "avg_ms": round(s["total_ms"] / s["count"], 2) if s["count"] else 0.0,
+            "max_ms": round(s["max_ms"], 2),
+            "last_ms": round(s["last_ms"], 2),
+        }
+        for route, s in _METRICS.items()
+    }
+
+
+def timed_route(route):
+    """Decorator recording wall-clock latency of an aiohttp handler under `route`."""
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(request):
+            start = time.perf_counter()
+            ok = False
+            try:
+                response = await handler(request)
+                ok = getattr(response, "status", 200) < 400
+                return response
+            finally:
+                stats = _record(route, time.perf_counter() - start, ok)
+                log(LogEntry(node_class="RouteMetrics", title=route, details={
+                    "Latency": f"{stats['last_ms']:.1f} ms",
+                    "Avg": f"{stats['total_ms'] / stats['count']:.1f} ms",
+                    "Calls": stats["count"],
+                }))
+        return wrapper
+    return decorator
+
+
+@PromptServer.instance.routes.get("/stalker/route_metrics")
+async def route_metrics(request):
+    return web.json_response(get_route_metrics())
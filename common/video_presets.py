@@ -0,0 +1,265 @@
+# ─── Video Codec Presets ────────────────────────────────────────────────
+# One table per encoder: container, pixel format and rate control for the
+# node's quality levels, plus how the generic speed setting maps onto the
+# encoder's own knob. `codec_args` turns a selection into ffmpeg options.
+
+QUALITIES = ("lossless", "high", "medium")
+SPEEDS = ("auto", "fastest", "fast", "medium", "slow", "slowest")
+
+# Per quality: (crf or None, pix_fmt, extra args)
+CODECS = {
+    "libx264": {
+        "label": "H.264 (x264)",
+        "container": ".mp4",
+        "quality": {
+            "lossless": (0, "rgb24", []),
+            "high": (17, "yuv420p", []),
+            "medium": (23, "yuv420p", []),
+        },
+        "max_crf": 51,
+        "speed_flag": "-preset",
+        "speeds": {"fastest": "ultrafast", "fast": "veryfast", "medium": "medium", "slow": "slow",
+                   "slowest": "veryslow"},
+        "auto_speed": {"lossless": "ultrafast", "high": "slow", "medium": "medium"},
+    },
+    "libx265": {
+        "label": "HEVC (x265)",
+        "container": ".mp4",
+        "quality": {
+            "lossless": (None, "yuv444p", ["-x265-params:v:0", "lossless=1"]),
+            "high": (20, "yuv420p", []),
+            "medium": (26, "yuv420p", []),
+        },
+        "max_crf": 51,
+        "speed_flag": "-preset",
+        "speeds": {"fastest": "ultrafast", "fast": "veryfast", "medium": "medium", "slow": "slow",
+                   "slowest": "veryslow"},
+        "auto_speed": {"lossless": "ultrafast", "high": "slow", "medium": "medium"},
+        # Apple players only accept the hvc1 sample entry
+        "extra": ["-tag:v:0", "hvc1"],
+    },
+    "libvpx-vp9": {
+        "label": "VP9 (libvpx)",
+        "container": ".mkv",
+        "quality": {
+            "lossless": (None, "yuv444p", ["-lossless:v:0", "1"]),
+            "high": (24, "yuv420p", ["-b:v:0", "0"]),
+            "medium": (33, "yuv420p", ["-b:v:0", "0"]),
+        },
+        "max_crf": 63,
+        "speed_flag": "-cpu-used",
+        "speeds": {"fastest": "8", "fast": "5", "medium": "3", "slow": "2", "slowest": "0"},
+        "auto_speed": {"lossless": "5", "high": "2", "medium": "3"},
+        "extra": ["-row-mt:v:0", "1", "-deadline:v:0", "good"],
+    },
+    "libsvtav1": {
+        "label": "AV1 (SVT-AV1)",
+        "container": ".mp4",
+        "quality": {
+            "high": (25, "yuv420p", []),
+            "medium": (35, "yuv420p", []),
+        },
+        "max_crf": 63,
+        "speed_flag": "-preset",
+        "speeds": {"fastest": "12", "fast": "10", "medium": "8", "slow": "5", "slowest": "2"},
+        "auto_speed": {"high": "6", "medium": "8"},
+    },
+    "libaom-av1": {
+        "label": "AV1 (libaom)",
+        "container": ".mp4",
+        "quality": {
+            "lossless": (None, "yuv444p", ["-lossless:v:0", "1"]),
+            "high": (24, "yuv420p", ["-b:v:0", "0"]),
+            "medium": (34, "yuv420p", ["-b:v:0", "0"]),
+        },
+        "max_crf": 63,
+        "speed_flag": "-cpu-used",
+        "speeds": {"fastest": "8", "fast": "6", "medium": "4", "slow": "2", "slowest": "0"},
+        "auto_speed": {"lossless": "6", "high": "4", "medium": "6"},
+        "extra": ["-row-mt:v:0", "1"],
+    },
+    "prores_ks": {
+        "label": "ProRes (prores_ks)",
+        "container": ".mov",
+        # No CRF: quality picks the profile (4444 XQ / HQ / Standard)
+        "quality": {
+            "lossless": (None, "yuv444p10le", ["-profile:v:0", "5"]),
+            "high": (None, "yuv422p10le", ["-profile:v:0", "3"]),
+            "medium": (None, "yuv422p10le", ["-profile:v:0", "2"]),
+        },
+        "max_crf": None,
+        "extra": ["-vendor:v:0", "apl0"],
+    },
+    "ffv1": {
+        "label": "FFV1 (archival, lossless)",
+        "container": ".mkv",
+        "quality": {
+            "lossless": (None, "gbrp", []),
+            "high": (None, "gbrp", []),
+            "medium": (None, "gbrp", []),
+        },
+        "max_crf": None,
+        "extra": ["-level:v:0", "3", "-g:v:0", "1", "-slicecrc:v:0", "1"],
+    },
+}
+
+
+def codec_args(codec, quality, speed="auto", crf=-1, threads=0):
+    """
+    FFmpeg options for output stream v:0.
+    Args:
+        codec: Key of CODECS
+        quality: One of QUALITIES
+        speed: One of SPEEDS ("auto" = the quality level's default)
+        crf: Override the quality level's CRF (-1 keeps it; ignored by codecs without CRF)
+        threads: Encoder threads, 0 = ffmpeg default
+    Returns:
+        (args, pix_fmt, container extension)
+    Raises:
+        ValueError: The codec has no such quality level (e.g. lossless SVT-AV1)
+    """
+    preset = CODECS[codec]
+    if quality not in preset["quality"]:
+        raise ValueError(f"{preset['label']} has no '{quality}' mode; "
+                         f"use one of {', '.join(preset['quality'])} (ffv1 for lossless archival)")
+    default_crf, pix_fmt, extra = preset["quality"][quality]
+
+    # libx264 lossless RGB needs the RGB flavour of the encoder
+    encoder = "libx264rgb" if codec == "libx264" and pix_fmt == "rgb24" else codec
+    args = ["-c:v:0", encoder]
+
+    if preset["max_crf"] is not None:
+        value = default_crf
+        if crf >= 0 and default_crf is not None:
+            value = min(crf, preset["max_crf"])
+        if value is not None:
+            args += ["-crf:v:0", str(value)]
+
+    if "speed_flag" in preset:
+        level = preset["auto_speed"].get(quality) if speed == "auto" else preset["speeds"][speed]
+        if level is not None:
+            args += [f"{preset['speed_flag']}:v:0", level]
+
+    if threads > 0:
+        args += ["-threads:v:0", str(threads)]
+    args += ["-pix_fmt:v:0", pix_fmt] + extra + preset.get("extra", [])
+    return args, pix_fmt, preset["container"]
+
+
+def required_encoders(codec, quality):
+    """Encoder names ffmpeg must provide for this selection."""
+    pix_fmt = CODECS[codec]["quality"].get(quality, (None, None, None))[1]
+    return ["libx264rgb"] if codec == "libx264" and pix_fmt == "rgb24" else [codec]
+
+
+# Animated preview sidecars: encoder and its output options
+PREVIEWS = {
+    "webp": {"extension": ".webp", "encoder": "libwebp_anim",
+             "args": ["-lossless", "0", "-quality", "75", "-loop", "0"]},
+    "gif": {"extension": ".gif", "encoder": "gif", "args": ["-loop", "0"]},
+}
+
+
+def preview_args(fmt, source_width, width=320, fps=0.0, prefilter=None):
+    """
+    Options for a second, downscaled animated output from the first video stream of input 0.
+    ffmpeg decodes the input once and hands the same frames to every output.
+    Args:
+        fmt: Key of PREVIEWS
+        source_width: Frame width; previews are never upscaled
+        width: Target width (height keeps the aspect ratio)
+        fps: Preview frame rate, 0 = the video's
+        prefilter: Filter applied first, e.g. the timestamps of a frame selection
+    Returns:
+        (output args without the path, extension)
+    """
+    spec = PREVIEWS[fmt]
+    chain = [prefilter] if prefilter else []
+    if fps > 0:
+        chain.append(f"fps={fps:g}")
+    chain.append(f"scale={min(width, source_width)}:-1:flags=lanczos")
+    if fmt == "gif":
+        # One palette per file: split the scaled stream, build the palette from one branch, apply it to the other
+        chain.append("split[s0][s1];[s0]palettegen=stats_mode=diff[p];[s1][p]paletteuse=dither=bayer")
+    args = ["-map", "0:v:0", "-filter:v", ",".join(chain), "-c:v", spec["encoder"]] + spec["args"]
+    return args, spec["extension"]
+
+
+# Container capabilities: faststart moov relocation and how a cover picture is stored
+CONTAINERS = {
+    ".mp4": {"faststart": True, "cover": "attached_pic"},
+    ".mkv": {"faststart": False, "cover": "attachment"},
+    # The mov muxer silently drops attached pictures
+    ".mov": {"faststart": True, "cover": None},
+}
+
+
+# Audio encoders: containers that can carry them and whether a bitrate applies
+AUDIO_CODECS = {
+    "aac": {"containers": (".mp4", ".mkv", ".mov"), "bitrate": True},
+    "libopus": {"containers": (".mp4", ".mkv"), "bitrate": True},
+    "libmp3lame": {"containers": (".mp4", ".mkv", ".mov"), "bitrate": True},
+    "flac": {"containers": (".mkv",), "bitrate": False},
+    "pcm_s16le": {"containers": (".mkv", ".mov"), "bitrate": False},
+}
+# "auto" audio codec per container
+DEFAULT_AUDIO = {".mp4": "aac", ".mkv": "libopus", ".mov": "pcm_s16le"}
+
+
+def audio_args(codec, container, bitrate=192, duration=None):
+    """
+    FFmpeg options for output stream a:0.
+    Args:
+        codec: Key of AUDIO_CODECS or "auto" (the container's default)
+        container: Extension from CODECS
+        bitrate: kbps for lossy codecs
+        duration: Seconds; the track is trimmed or padded with silence to exactly this length
+    Returns:
+        (encoder name, args)
+    Raises:
+        ValueError: The container cannot store the codec
+    """
+    codec = DEFAULT_AUDIO[container] if codec == "auto" else codec
+    if container not in AUDIO_CODECS[codec]["containers"]:
+        raise ValueError(f"{container} cannot store {codec} audio; "
+                         f"use one of {', '.join(c for c, v in AUDIO_CODECS.items() if container in v['containers'])}")
+    args = ["-c:a:0", codec]
+    if AUDIO_CODECS[codec]["bitrate"]:
+        args += ["-b:a:0", f"{bitrate}k"]
+    if duration is not None:
+        args += ["-filter:a:0", f"atrim=end={duration:.6f},apad=whole_dur={duration:.6f}"]
+    return codec, args
+
+
+def output_args(container, video_args, cover_path=None, audio=None):
+    """
+    Stream mapping for the first video stream of input 0 plus an optional cover image and audio track.
+    Args:
+        container: Extension from CODECS
+        video_args: Options for output stream v:0 (encoder settings or ["-c:v:0", "copy"])
+        cover_path: JPEG to embed, or None
+        audio: (input args ending in "-i <source>", options from `audio_args`), or None
+    Returns:
+        (extra input args, output args, whether the cover is embedded)
+    """
+    info = CONTAINERS[container]
+    mode = info["cover"] if cover_path else None
+    inputs, args = [], []
+    if mode == "attached_pic":
+        inputs = ["-i", str(cover_path)]
+        args = ["-map", "0:v:0", "-map", "1:v"] + video_args
+        args += ["-c:v:1", "mjpeg", "-disposition:v:1", "attached_pic"]
+    elif mode == "attachment":
+        args = ["-map", "0:v:0"] + video_args
+        args += ["-attach", str(cover_path), "-metadata:s:t:0", "mimetype=image/jpeg",
+                 "-metadata:s:t:0", "filename=cover.jpg"]
+    else:
+        args = ["-map", "0:v:0"] + video_args
+    if audio is not None:
+        audio_inputs, audio_options = audio
+        # Input 0 is the video, input 1 the cover when it is a separate input
+        args += ["-map", f"{2 if inputs else 1}:a:0"] + audio_options
+        inputs = inputs + audio_inputs
+    if info["faststart"]:
+        args += ["-movflags", "+faststart"]
+    return inputs, args, mode is not None
@@ -0,0 +1,125 @@
+import atexit
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from ..config.config_manager import ConfigManager
+from .logger import LogEntry, log
+
+
+def atomic_write(path, write_fn):
+    """
+    Write a file through a hidden temp sibling and rename it into place.
+    Readers never observe a partially written file.
+    Args:
+        path: Final destination
+        write_fn: Callable receiving the temp path to write to
+    """
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        write_fn(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        raise
+    return path
+
+
+def run_pipelined(jobs, workers=0):
+    """
+    Run write jobs concurrently and return their results in submission order.
+    Encoders that release the GIL (zlib, libwebp, libjpeg) scale with the worker count.
+    Args:
+        jobs: List of zero-argument callables
+        workers: Thread count, 0 = one per CPU core (capped by job count)
+    """
+    if not jobs:
+        return []
+    workers = min(len(jobs), workers if workers > 0 else (os.cpu_count() or 1))
+    if workers == 1:
+        return [job() for job in jobs]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="stalker-write") as pool:
+        futures = [pool.submit(job) for job in jobs]
+        return [f.result() for f in futures]
+
+
+class BackgroundWriter:
+    """
+    Fire-and-forget write queue drained by daemon threads.
+    The queue is bounded: submitting blocks once `max_pending` jobs are waiting,
+    which caps the memory held by frames that have not been written yet.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._initialize()
+        return cls._instance
+
+    def _initialize(self):
+        config = ConfigManager()
+        self._queue = queue.Queue(maxsize=max(1, int(config.get("writers.background_queue_size", 64))))
+        self._workers = max(1, int(config.get("writers.background_workers", 2)))
+        self._threads = []
+        atexit.register(self.drain)
+
+    def _ensure_threads(self):
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self._workers):
+                t = threading.Thread(target=self._run, name=f"stalker-bg-write-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def _run(self):
+        while True:
+            job, on_done = self._queue.get()
+            try:
+                job()
+            except Exception as e:
+                log(LogEntry(node_class="BackgroundWriter", title="Background write failed", details={"Error": str(e)}))
+            finally:
+                if on_done is not None:
+                    on_done()
+                self._queue.task_done()
+
+    def submit_batch(self, jobs, on_complete=None):
+        """Queue jobs; `on_complete` runs once after the last job of this batch finished."""
+        if not jobs:
+            if on_complete is not None:
+                on_complete()
+            return
+        self._ensure_threads()
+        remaining = [len(jobs)]
+        counter_lock = threading.Lock()
+
+        def on_done():
+            with counter_lock:
+                remaining[0] -= 1
+                finished = remaining[0] == 0
+            if finished and on_complete is not None:
+                on_complete()
+
+        for job in jobs:
+            self._queue.put((job, on_done))
+
+    def pending(self):
+        return self._queue.unfinished_tasks
+
+    def drain(self):
+        """Block until every queued job has been written."""
+        if self._threads:
+            self._queue.join()
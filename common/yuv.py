@@ -0,0 +1,99 @@
+import functools
+
+import numpy as np
+import torch
+
+from .images import tensor_to_uint8
+
+# ─── RGB -> YUV 4:2:0 ───────────────────────────────────────────────────
+# Limited-range ("tv") Y'CbCr as defined by ITU-R BT.601 / BT.709, computed
+# from the same truncated uint8 RGB the rgb24 path would pipe, so the encoder
+# receives planar yuv420p at half the bytes of rgb24. Chroma is the rounded
+# mean of each 2x2 block (centered siting, as with swscale's area filter).
+
+# matrix -> (Kr, Kb)
+MATRICES = {"bt709": (0.2126, 0.0722), "bt601": (0.299, 0.114)}
+
+# FFmpeg color tags per matrix: colorspace, primaries, transfer
+COLOR_TAGS = {
+    "bt709": ("bt709", "bt709", "bt709"),
+    "bt601": ("smpte170m", "smpte170m", "smpte170m"),
+}
+
+
+@functools.lru_cache(maxsize=4)
+def _coefficients(matrix):
+    """Float32 (3,) luma row and (3, 2) Cb/Cr columns acting on 0-255 RGB."""
+    kr, kb = MATRICES[matrix]
+    kg = 1.0 - kr - kb
+    luma = np.array([kr, kg, kb], dtype=np.float32) * (219.0 / 255.0)
+    cb = np.array([-kr, -kg, 1.0 - kb]) * (224.0 / 255.0 / (2.0 * (1.0 - kb)))
+    cr = np.array([1.0 - kr, -kg, -kb]) * (224.0 / 255.0 / (2.0 * (1.0 - kr)))
+    return luma, np.stack([cb, cr], axis=1).astype(np.float32)
+
+
+def _frame_to_yuv420p(rgb, out, matrix):
+    """One uint8 (H, W, 3) frame into `out` (H * W * 3 // 2,) with NumPy/BLAS."""
+    h, w = rgb.shape[:2]
+    luma, chroma = _coefficients(matrix)
+
+    y = rgb.reshape(-1, 3) @ luma
+    y += 16.5  # + 0.5 and truncation = round half up
+    out[:h * w] = y
+
+    # 2x2 block sums: contiguous row pairs first, then neighbouring pixels
+    rows = rgb.reshape(h // 2, 2, w * 3)
+    pairs = rows[:, 0].astype(np.uint16)
+    pairs += rows[:, 1]
+    pairs = pairs.reshape(h // 2, w // 2, 6)
+    sums = pairs[..., :3] + pairs[..., 3:]
+
+    c = sums.reshape(-1, 3) @ (chroma * 0.25)
+    c += 128.5
+    np.clip(c, 0, 255, out=c)
+    out[h * w:].reshape(2, -1)[:] = c.T
+
+
+def _chunk_to_yuv420p_torch(images, matrix):
+    """Device-side variant for GPU tensors; only the uint8 planes cross to the host."""
+    b, h, w = images.shape[:3]
+    luma, chroma = (torch.from_numpy(c).to(images.device) for c in _coefficients(matrix))
+    rgb = torch.mul(images[..., :3].float(), 255.0).clamp_(0, 255).floor_()
+    y = torch.matmul(rgb, luma).add_(16.5).floor_()
+    half = rgb.view(b, h // 2, 2, w // 2, 2, 3).mean(dim=(2, 4))
+    c = torch.matmul(half, chroma).add_(128.5).floor_().clamp_(0, 255)
+    planes = torch.cat([y.reshape(b, -1), c[..., 0].reshape(b, -1), c[..., 1].reshape(b, -1)], dim=1)
+    return planes.to(torch.uint8).cpu()
+
+
+def rgb_to_yuv420p(images, matrix="bt709"):
+    """
+    Convert float RGB frames to packed planar yuv420p.
+    Args:
+        images: Tensor (B, H, W, C) in [0, 1] with even H and W
+        matrix: "bt709" or "bt601"
+    Returns:
+        uint8 CPU tensor (B, H * W * 3 // 2): Y plane, then Cb, then Cr per frame
+    """
+    b, h, w = images.shape[:3]
+    if h % 2 or w % 2:
+        raise ValueError(f"yuv420p needs even dimensions, got {w}x{h}")
+    if images.device.type != "cpu":
+        return _chunk_to_yuv420p_torch(images, matrix)
+
+    out = np.empty((b, h * w * 3 // 2), dtype=np.uint8)
+    for i in range(b):
+        _frame_to_yuv420p(tensor_to_uint8(images[i, :, :, :3]).numpy(), out[i], matrix)
+    return torch.from_numpy(out)
+
+
+def yuv420p_chunk(images, matrix="bt709"):
+    """feed_frames converter: frame chunk -> contiguous yuv420p bytes."""
+    return rgb_to_yuv420p(images, matrix).numpy().reshape(-1)
+
+
+def color_tag_args(matrix, stream="v:0"):
+    """FFmpeg output options tagging a limited-range stream with `matrix`."""
+    colorspace, primaries, trc = COLOR_TAGS[matrix]
+    return [f"-colorspace:{stream}", colorspace, f"-color_primaries:{stream}", primaries,
+            f"-color_trc:{stream}", trc, f"-color_range:{stream}", "tv"]
@@ -1,10 +1,10 @@
 import os
 import torch
 import torch.nn.functional as F
-import numpy as np
 from PIL import Image
 from ...common.constants import CATEGORY_PREFIX
 from ...common.logger import LogEntry, log
+from ...common.images import tensor_to_uint8
 
 class ImageCropper:
     """
@@ -82,8 +82,7 @@ class ImageCropper:
         if save_to_folder and save_path:
             os.makedirs(save_path, exist_ok=True)
             for idx in range(batch_size):
-                img = cropped_images[idx].cpu()  # Move to CPU for numpy conversion
-                np_img = (img.numpy() * 255).astype(np.uint8)
+                np_img = tensor_to_uint8(cropped_images[idx]).numpy()
                 if c == 1:
                     np_img = np_img[:, :, 0]
                     mode = "L"
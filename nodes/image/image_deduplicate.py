@@ -0,0 +1,164 @@
+import json
+import os
+import time
+import torch
+from PIL import Image, ImageOps
+from pathlib import Path
+from ...common.constants import CATEGORY_PREFIX
+from ...common.logger import LogEntry, log
+from ...common.images import pil2tensor, pil_to_uint8
+from ...common.writers import run_pipelined
+from ...common.directory_index import DirectoryIndex
+from ...common.phash import HASH_TYPES, THUMB_SIZES, cluster_hashes, hash_thumbnails, image_hashes
+from .image_metadata_io import IMAGE_EXTENSIONS
+
+
+class ImageDeduplicate:
+    """
+    ImageDeduplicate
+    ----------------
+    Removes near-identical images from an IMAGE batch or a directory using perceptual hashes.
+    Hashes are computed batched on the tensor's device and clustered by Hamming distance
+    with a BK-tree; the first image of each cluster is kept. Directory hashes are cached
+    in the directory index and reused until a file changes.
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "hash_type": (list(HASH_TYPES), {"default": "phash",
+                              "tooltip": "phash: robust to resizing/compression. dhash: gradients. ahash: fastest, loosest"}),
+                "threshold": ("INT", {"default": 6, "min": 0, "max": 32,
+                              "tooltip": "Max Hamming distance (of 64 bits) for two images to count as duplicates"}),
+            },
+            "optional": {
+                "images": ("IMAGE", {"tooltip": "Batch to deduplicate (takes precedence over directory_path)"}),
+                "directory_path": ("STRING", {"default": "", "tooltip": "Directory of images to deduplicate"}),
+                "use_hash_cache": ("BOOLEAN", {"default": True,
+                                   "tooltip": "Directory mode: reuse hashes stored in the directory index"}),
+            }
+        }
+
+    RETURN_TYPES = ("IMAGE", "STRING", "STRING")
+    RETURN_NAMES = ("images", "report", "kept")
+    FUNCTION = "deduplicate"
+    CATEGORY = f"{CATEGORY_PREFIX}/Image"
+    OUTPUT_IS_LIST = (True, False, False)
+
+    def deduplicate(self, hash_type, threshold, images=None, directory_path="", use_hash_cache=True):
+        start = time.perf_counter()
+        if images is not None:
+            labels = list(range(images.shape[0]))
+            hashes = image_hashes(images, hash_type)
+            cached = 0
+        elif directory_path.strip():
+            files, hashes, cached = self._directory_hashes(self._list_files(Path(directory_path.strip())),
+                                                           hash_type, use_hash_cache)
+            labels = [f.name for f in files]
+        else:
+            raise ValueError("Connect images or set directory_path")
+        hashed = time.perf_counter()
+
+        assignment = cluster_hashes(hashes, threshold)
+        kept = [i for i, (keeper, _) in enumerate(assignment) if keeper == i]
+
+        if images is not None:
+            out_images = [images[kept]] if kept else []
+        else:
+            out_images = self._load_images([files[i] for i in kept])
+
+        report = self._build_report(labels, hashes, assignment, hash_type, threshold)
+        log(LogEntry(node_class="ImageDeduplicate", title="Deduplicated", details={
+            "Source": "batch" if images is not None else directory_path.strip(),
+            "Hash": hash_type,
+            "Threshold": threshold,
+            "Images": len(labels),
+            "Kept": len(kept),
+            "Removed": len(labels) - len(kept),
+            "Cached Hashes": cached,
+            "Hash Time": f"{(hashed - start) * 1000:.1f} ms",
+        }))
+        return (out_images, json.dumps(report, ensure_ascii=False, indent=2),
+                "\n".join(str(labels[i]) for i in kept))
+
+    def _list_files(self, directory):
+        if not directory.is_dir():
+            raise ValueError(f"Directory not found: {directory}")
+        files = [e for e in directory.iterdir() if e.is_file() and e.suffix.lower() in IMAGE_EXTENSIONS]
+        files.sort(key=lambda x: x.name)
+        return files
+
+    def _directory_hashes(self, files, hash_type, use_hash_cache):
+        """
+        Hash files, decoding only those without a valid cached hash.
+        Returns:
+            (files that could be hashed, hashes, number of cache hits)
+        """
+        index = DirectoryIndex.for_directory(files[0].parent) if files else None
+        stats = [f.stat() for f in files]
+        hashes = [None] * len(files)
+        if use_hash_cache and index is not None:
+            for i, (f, st) in enumerate(zip(files, stats)):
+                hashes[i] = index.get_hash(hash_type, f.name, st.st_mtime_ns, st.st_size)
+
+        missing = [i for i, h in enumerate(hashes) if h is None]
+        if missing:
+            h, w = THUMB_SIZES[hash_type]
+            thumbs = run_pipelined([lambda f=files[i]: self._thumbnail(f, (w, h)) for i in missing])
+            decoded = [(i, t) for i, t in zip(missing, thumbs) if t is not None]
+            if decoded:
+                batch = torch.stack([pil_to_uint8(t).squeeze(-1) for _, t in decoded]).float().div_(255.0)
+                for (i, _), value in zip(decoded, hash_thumbnails(batch, hash_type)):
+                    hashes[i] = value
+            missing = [i for i, _ in decoded]
+
+        if index is not None:
+            for i in missing:
+                index.set_hash(hash_type, files[i].name, stats[i].st_mtime_ns, stats[i].st_size, hashes[i])
+            index.prune_hashes(f.name for f in files)
+            if missing:
+                try:
+                    index.save()
+                except OSError as e:
+                    log(LogEntry(node_class="ImageDeduplicate", title="Hash cache not persisted",
+                                 details={"Directory": index.directory, "Error": str(e)}))
+        valid = [i for i, h in enumerate(hashes) if h is not None]
+        return [files[i] for i in valid], [hashes[i] for i in valid], len(valid) - len(missing)
+
+    def _thumbnail(self, path, size):
+        try:
+            with Image.open(path) as img:
+                # JPEG can decode at reduced scale directly
+                img.draft("L", (size[0] * 8, size[1] * 8))
+                img = ImageOps.exif_transpose(img).convert("L")
+                return img.resize(size, Image.BOX)
+        except Exception as e:
+            log(LogEntry(node_class="ImageDeduplicate", title="Skipped",
+                         details={"File": os.path.basename(path), "Error": str(e)}))
+            return None
+
+    def _load_images(self, files):
+        out = []
+        for f in files:
+            try:
+                with Image.open(f) as img:
+                    out.append(pil2tensor(ImageOps.exif_transpose(img).convert("RGB")))
+            except Exception as e:
+                log(LogEntry(node_class="ImageDeduplicate", title="Skipped",
+                             details={"File": os.path.basename(f), "Error": str(e)}))
+        return out
+
+    def _build_report(self, labels, hashes, assignment, hash_type, threshold):
+        clusters = {}
+        for i, (keeper, dist) in enumerate(assignment):
+            if keeper != i:
+                clusters.setdefault(keeper, []).append({"item": labels[i], "distance": dist})
+        return {
+            "hash_type": hash_type,
+            "threshold": threshold,
+            "total": len(labels),
+            "kept": sum(1 for i, (keeper, _) in enumerate(assignment) if keeper == i),
+            "clusters": [{"keep": labels[k], "duplicates": dups} for k, dups in clusters.items()],
+            "hashes": {str(label): f"{value:016x}" for label, value in zip(labels, hashes)},
+        }
@@ -1,9 +1,9 @@
 import os
 import torch
-import numpy as np
 from PIL import Image
 from ...common.constants import CATEGORY_PREFIX
 from ...common.logger import LogEntry, log
+from ...common.images import tensor_to_uint8
 
 class ImageGridCropper:
     """
@@ -100,7 +100,7 @@ class ImageGridCropper:
                     # Optional: Save crop to disk
                     if save_to_folder and save_path:
                         os.makedirs(save_path, exist_ok=True)
-                        np_img = (crop.cpu().numpy() * 255).astype(np.uint8)
+                        np_img = tensor_to_uint8(crop).numpy()
 
                         if c == 1:
                             np_img = np_img[:, :, 0]
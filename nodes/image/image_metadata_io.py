@@ -1,48 +1,77 @@
 import os
 import torch
-import numpy as np
+import torch.nn.functional as F
 import json
 import re
+import functools
+import time
 import folder_paths
 
-from PIL import Image, ImageOps, PngImagePlugin
+from PIL import Image, ImageOps
 from pathlib import Path
 from ...common.constants import CATEGORY_PREFIX
 from ...common.logger import LogEntry, log
+from ...common.images import tensor_to_uint8, pil2tensor, pil2mask
+from ...common.writers import atomic_write, run_pipelined, BackgroundWriter
+from ...common.numbering import reserve_numbers, release_numbers
+from ...common.compaction import PngCompactor
+from ...common.directory_index import DirectoryIndex
+from ...common.directory_watch import change_token
+from ...config.config_manager import ConfigManager
+from ...common.image_formats import (FORMATS, EXIF_TEXT_TAGS, JPEG_EXIF_LIMIT, METADATA_SIDECAR,
+                                     available_formats, build_exif, build_pnginfo, exif_text_items,
+                                     is_format_available, metadata_sidecar_path, read_exif_text,
+                                     read_metadata_sidecar, save_image)
 
 from aiohttp import web
 from server import PromptServer
+from ...common.routes import run_blocking, timed_route
 
 _METADATA_CACHE = {}
+_METADATA_CACHE_SEQ = 0
+
+
+def _read_metadata_for_cache(filename):
+    """Blocking part of the metadata cache route; runs in the extension executor."""
+    image_path = folder_paths.get_annotated_filepath(filename)
+    if not os.path.exists(image_path):
+        raise FileNotFoundError(filename)
+
+    with Image.open(image_path) as img:
+        raw_meta = _extract_png_metadata_static(img, image_path)
+    return _parse_metadata_static(raw_meta)
 
 
 @PromptServer.instance.routes.post("/stalker/metadata_cache")
+@timed_route("/stalker/metadata_cache")
 async def cache_latest_metadata(request):
+    global _METADATA_CACHE, _METADATA_CACHE_SEQ
+    _METADATA_CACHE_SEQ += 1
+    seq = _METADATA_CACHE_SEQ
     try:
         data = await request.json()
         filename = data.get("filename")
         if not filename:
             return web.json_response({"error": "no filename"}, status=400)
 
-        image_path = folder_paths.get_annotated_filepath(filename)
-        if not os.path.exists(image_path):
-            return web.json_response({"error": "file not found"}, status=404)
+        parsed_meta = await run_blocking(("metadata_cache", filename), _read_metadata_for_cache, filename)
 
-        with Image.open(image_path) as img:
-            raw_meta = _extract_png_metadata_static(img)
-            parsed_meta = _parse_metadata_static(raw_meta)
-            global _METADATA_CACHE
-            _METADATA_CACHE = parsed_meta
+        # A newer selection arrived while this one was parsing; keep the newer result
+        if seq != _METADATA_CACHE_SEQ:
+            return web.json_response({"status": "superseded"})
 
+        _METADATA_CACHE = parsed_meta
         log(LogEntry(node_class="MetadataCache", title="Updated latest metadata", details={"Filename": filename}))
         return web.json_response({"status": "success"})
+    except FileNotFoundError:
+        return web.json_response({"error": "file not found"}, status=404)
     except Exception as e:
         log(LogEntry(node_class="MetadataCache", title="Cache update error", details={"Error": str(e)}))
         return web.json_response({"error": str(e)}, status=500)
 
 
-def _extract_png_metadata_static(img):
-    metadata = {}
+def _extract_png_metadata_static(img, path=None):
+    metadata = read_metadata_sidecar(path) if path else {}
     if hasattr(img, 'text') and isinstance(img.text, dict):
         for k, v in img.text.items():
             if isinstance(v, str): metadata[k] = v
@@ -50,6 +79,7 @@ def _extract_png_metadata_static(img):
         for k, v in img.info.items():
             if isinstance(v, str) and k not in ['dpi', 'gamma', 'transparency', 'aspect']:
                 metadata[k] = v
+    metadata.update(read_exif_text(img))
     return metadata
 
 
@@ -87,10 +117,40 @@ def _smart_convert_value_static(value):
     return val
 
 
+def _first(value):
+    """Unwrap a widget value delivered as a one-element list by INPUT_IS_LIST nodes."""
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value
+
+
+def _single(value, name):
+    """
+    Unwrap an INPUT_IS_LIST value that cannot vary per item. A list of equal values is
+    accepted; differing values raise instead of silently using the first one.
+    """
+    if isinstance(value, list) and any(v != value[0] for v in value[1:]):
+        raise ValueError(f"'{name}' got {len(value)} different values; it must be the same for the whole batch")
+    return _first(value)
+
+
+# Watches whose last run left files that were still being written
+_WATCH_PENDING = set()
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.webp', '.bmp', '.tiff', '.tif', '.avif', '.jxl'}
+
+
 class ImagesLoadWithMetadata:
     @classmethod
-    def IS_CHANGED(cls, **kwargs):
-        return float("nan")
+    def IS_CHANGED(cls, directory_path="", watch_mode=False, watch_id="default", reset_watch=False, **kwargs):
+        directory_path = directory_path.strip()
+        if not watch_mode or reset_watch or not directory_path:
+            return float("nan")
+        if (os.path.realpath(directory_path), watch_id.strip() or "default") in _WATCH_PENDING:
+            return float("nan")
+        # Unchanged token -> ComfyUI reuses the cached (already emitted) result and skips the run
+        backend, token = change_token(directory_path)
+        return f"{backend}:{token}" if token is not None else float("nan")
 
     @classmethod
     def INPUT_TYPES(cls):
@@ -101,6 +161,16 @@ class ImagesLoadWithMetadata:
             },
             "optional": {
                 "extract_key": ("STRING", {"default": "", "tooltip": "Extract specific metadata key"}),
+                "output_mode": (["list", "batch"], {"default": "list",
+                                "tooltip": "list: one tensor per image. batch: same-size images stacked into [B,H,W,C] groups"}),
+                "resize_policy": (["none", "first", "largest", "smallest"], {"default": "none",
+                                  "tooltip": "Batch mode only: resize every image to a common size so the folder becomes one batch"}),
+                "watch_mode": ("BOOLEAN", {"default": False,
+                               "tooltip": "Hot folder: return only files added or modified since the previous run"}),
+                "watch_id": ("STRING", {"default": "default",
+                             "tooltip": "Cursor name; different ids track the same folder independently"}),
+                "reset_watch": ("BOOLEAN", {"default": False,
+                                "tooltip": "Forget the cursor and emit every file again (on every run while enabled)"}),
             }
         }
 
@@ -110,7 +180,8 @@ class ImagesLoadWithMetadata:
     CATEGORY = f"{CATEGORY_PREFIX}/Image"
     OUTPUT_IS_LIST = (True, True, True, True)
 
-    def load_images_with_metadata(self, directory_path, sort_by="name", extract_key=""):
+    def load_images_with_metadata(self, directory_path, sort_by="name", extract_key="", output_mode="list",
+                                  resize_policy="none", watch_mode=False, watch_id="default", reset_watch=False):
         directory_path = directory_path.strip()
         if not directory_path:
             raise ValueError("Directory path cannot be empty")
@@ -119,8 +190,10 @@ class ImagesLoadWithMetadata:
         if not directory.exists():
             return ([], [], [], [])
 
-        supported_ext = {'.png', '.jpg', '.jpeg', '.webp', '.bmp', '.tiff', '.tif'}
-        image_files = [e for e in directory.iterdir() if e.is_file() and e.suffix.lower() in supported_ext]
+        if watch_mode:
+            image_files = self._collect_watched(directory, watch_id.strip() or "default", reset_watch)
+        else:
+            image_files = [e for e in directory.iterdir() if e.is_file() and e.suffix.lower() in IMAGE_EXTENSIONS]
         if not image_files:
             return ([], [], [], [])
 
@@ -136,7 +209,7 @@ class ImagesLoadWithMetadata:
                 img = Image.open(file_path)
                 img = ImageOps.exif_transpose(img)
 
-                raw_meta = self._extract_image_metadata(img)
+                raw_meta = self._extract_image_metadata(img, file_path)
                 metadata = self._parse_metadata(raw_meta)
                 meta_json_list.append(json.dumps(metadata, ensure_ascii=False, indent=2))
 
@@ -144,14 +217,11 @@ class ImagesLoadWithMetadata:
                 meta_val_list.append(extracted)
 
                 if 'A' in img.getbands():
-                    alpha = np.array(img.getchannel('A')).astype(np.float32) / 255.0
-                    mask_list.append((1.0 - torch.from_numpy(alpha)).unsqueeze(0))
+                    mask_list.append(pil2mask(img))
                 else:
                     mask_list.append(torch.zeros((img.size[1], img.size[0]), dtype=torch.float32).unsqueeze(0))
 
-                img_rgb = img.convert('RGB')
-                img_np = np.array(img_rgb).astype(np.float32) / 255.0
-                image_list.append(torch.from_numpy(img_np).unsqueeze(0))
+                image_list.append(pil2tensor(img.convert('RGB')))
 
                 log(LogEntry(node_class="ImagesLoadWithMetadata", title="Loaded", details={"File": file_path.name}))
             except Exception as e:
@@ -159,10 +229,102 @@ class ImagesLoadWithMetadata:
                              details={"File": file_path.name, "Error": str(e)}))
                 continue
 
+        if output_mode == "batch" and image_list:
+            return self._stack_batches(image_list, mask_list, meta_json_list, meta_val_list, resize_policy)
+
         return (image_list, mask_list, meta_json_list, meta_val_list)
 
-    def _extract_image_metadata(self, img):
-        metadata = {}
+    def _collect_watched(self, directory, watch_id, reset_watch):
+        """
+        Files whose (mtime, name) is past the persisted cursor, then advance the cursor.
+        Files modified within `watch.settle_seconds` may still be written and wait for the next run.
+        """
+        index = DirectoryIndex.for_directory(directory)
+        if reset_watch:
+            index.set_cursor(watch_id, None)
+        cursor = index.get_cursor(watch_id)
+        settle_ns = int(float(ConfigManager().get("watch.settle_seconds", 1.0)) * 1e9)
+        cutoff = time.time_ns() - settle_ns
+
+        ready, pending = [], 0
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not entry.is_file() or os.path.splitext(entry.name)[1].lower() not in IMAGE_EXTENSIONS:
+                    continue
+                key = (entry.stat().st_mtime_ns, entry.name)
+                if cursor is not None and key <= cursor:
+                    continue
+                if key[0] > cutoff:
+                    pending += 1
+                    continue
+                ready.append(key)
+
+        pending_key = (index.directory, watch_id)
+        if pending:
+            _WATCH_PENDING.add(pending_key)
+        else:
+            _WATCH_PENDING.discard(pending_key)
+
+        if ready:
+            index.set_cursor(watch_id, max(ready))
+        if ready or reset_watch:
+            try:
+                index.save()
+            except OSError as e:
+                log(LogEntry(node_class="ImagesLoadWithMetadata", title="Watch cursor not persisted",
+                             details={"Directory": str(directory), "Error": str(e)}))
+
+        backend, _ = change_token(directory)
+        log(LogEntry(node_class="ImagesLoadWithMetadata", title="Watch", details={
+            "Directory": str(directory),
+            "Watch Id": watch_id,
+            "New": len(ready),
+            "Pending": pending,
+            "Backend": backend,
+        }))
+        return [directory / name for _, name in sorted(ready)]
+
+    def _stack_batches(self, image_list, mask_list, meta_json_list, meta_val_list, resize_policy):
+        """Group same-resolution images into [B,H,W,C] tensors; metadata becomes a JSON array per group."""
+        if resize_policy != "none":
+            sizes = [img.shape[1:3] for img in image_list]
+            if resize_policy == "first":
+                target = tuple(sizes[0])
+            elif resize_policy == "largest":
+                target = tuple(max(sizes, key=lambda s: s[0] * s[1]))
+            else:
+                target = tuple(min(sizes, key=lambda s: s[0] * s[1]))
+            image_list = [self._resize_to(img, target) for img in image_list]
+            mask_list = [self._resize_to(m.unsqueeze(-1), target).squeeze(-1) for m in mask_list]
+
+        groups = {}
+        for i, img in enumerate(image_list):
+            groups.setdefault(tuple(img.shape[1:3]), []).append(i)
+
+        images_out, masks_out, json_out, value_out = [], [], [], []
+        for indices in groups.values():
+            images_out.append(torch.cat([image_list[i] for i in indices], dim=0))
+            masks_out.append(torch.cat([mask_list[i] for i in indices], dim=0))
+            json_out.append("[" + ",\n".join(meta_json_list[i] for i in indices) + "]")
+            value_out.append(json.dumps([meta_val_list[i] for i in indices], ensure_ascii=False))
+
+        log(LogEntry(node_class="ImagesLoadWithMetadata", title="Batched", details={
+            "Images": len(image_list),
+            "Groups": len(groups),
+            "Resize Policy": resize_policy,
+            **{f"{w}x{h}": len(idx) for (h, w), idx in groups.items()},
+        }))
+        return (images_out, masks_out, json_out, value_out)
+
+    def _resize_to(self, tensor, size):
+        if tuple(tensor.shape[1:3]) == tuple(size):
+            return tensor
+        resized = F.interpolate(tensor.movedim(-1, 1), size=tuple(size), mode="bilinear", align_corners=False)
+        return resized.movedim(1, -1).clamp(0.0, 1.0)
+
+    def _extract_image_metadata(self, img, path=None):
+        # Keys the saver moved out of EXIF (size limit); anything in the file itself wins
+        metadata = read_metadata_sidecar(path) if path else {}
         if hasattr(img, 'text') and isinstance(img.text, dict):
             for k, v in img.text.items():
                 if isinstance(v, str): metadata[k] = v
@@ -170,12 +332,16 @@ class ImagesLoadWithMetadata:
             for k, v in img.info.items():
                 if isinstance(v, str) and k not in ['dpi', 'gamma', 'transparency', 'aspect']:
                     metadata[k] = v
+        exif_text = read_exif_text(img)
         if hasattr(img, '_getexif') and callable(img._getexif):
             exif_data = img._getexif()
             if exif_data:
                 for tag, value in exif_data.items():
+                    if tag in EXIF_TEXT_TAGS and exif_text:
+                        continue
                     if isinstance(value, (str, int, float)) and len(str(value)) < 1000:
                         metadata[f"exif_{tag}"] = str(value)
+        metadata.update(exif_text)
         return metadata
 
     def _parse_metadata(self, raw_metadata):
@@ -211,18 +377,17 @@ class ImageLoadWithMetadata:
         final_metadata = _METADATA_CACHE.copy()
         if not final_metadata:
             try:
-                final_metadata = self._parse_metadata(self._extract_png_metadata(img))
+                final_metadata = self._parse_metadata(self._extract_png_metadata(img, image_path))
             except Exception as e:
                 log(LogEntry(node_class="ImageLoadWithMetadata", title="Fallback metadata failed",
                              details={"Error": str(e)}))
                 final_metadata = {}
 
         frame = img.convert("RGB")
-        image_tensor = torch.from_numpy(np.array(frame).astype(np.float32) / 255.0)[None,]
+        image_tensor = pil2tensor(frame)
 
         if 'A' in img.getbands():
-            mask_np = np.array(img.getchannel('A')).astype(np.float32) / 255.0
-            mask_tensor = (1.0 - torch.from_numpy(mask_np)).unsqueeze(0)
+            mask_tensor = pil2mask(img)
         else:
             mask_tensor = torch.zeros((frame.size[1], frame.size[0]), dtype=torch.float32).unsqueeze(0)
 
@@ -244,8 +409,8 @@ class ImageLoadWithMetadata:
                      details={"File": image, "Size": f"{img.width}x{img.height}", "Mode": img.mode}))
         return (image_tensor, mask_tensor, metadata_json, metadata_value)
 
-    def _extract_png_metadata(self, img):
-        return _extract_png_metadata_static(img)
+    def _extract_png_metadata(self, img, path=None):
+        return _extract_png_metadata_static(img, path)
 
     def _parse_metadata(self, raw_metadata):
         return _parse_metadata_static(raw_metadata)
@@ -269,7 +434,24 @@ class ImageSaveWithMetadata:
                 "metadata_json": ("STRING", {"default": "{}", "multiline": False, "dynamicPrompts": False}),
                 "compression_level": ("INT", {"default": 0, "min": 0, "max": 9, "step": 1}),
             },
-            "optional": {"captions": ("STRING", {"forceInput": True})},
+            "optional": {
+                "captions": ("STRING", {"forceInput": True,
+                             "tooltip": "One caption for all frames, or a list with one caption per frame"}),
+                "writer_workers": ("INT", {"default": 0, "min": 0, "max": 64, "step": 1,
+                                   "tooltip": "Parallel encode/write threads (0 = one per CPU core)"}),
+                "background_write": ("BOOLEAN", {"default": False,
+                                     "tooltip": "Return immediately; frames are written by a bounded background queue"}),
+                "file_format": (list(FORMATS), {"default": "png",
+                                "tooltip": "png / webp_lossless use compression_level; webp / jpeg / avif / jxl use quality"}),
+                "quality": ("INT", {"default": 90, "min": 1, "max": 100, "step": 1,
+                            "tooltip": "Quality for lossy formats"}),
+                "deferred_compression": ("BOOLEAN", {"default": False,
+                                         "tooltip": "PNG only: recompress saved files in the background while the queue is idle"}),
+                "deferred_level": ("INT", {"default": 9, "min": 1, "max": 9, "step": 1,
+                                   "tooltip": "zlib level used by the deferred recompression (9 also optimizes)"}),
+                "sidecar_mode": (["per_file", "manifest"], {"default": "per_file",
+                                 "tooltip": "per_file: .txt caption next to each image. manifest: one JSONL (path, caption, metadata) per batch"}),
+            },
             "hidden": {"prompt": "PROMPT", "extra_pnginfo": "EXTRA_PNGINFO"},
         }
 
@@ -278,34 +460,137 @@ class ImageSaveWithMetadata:
     FUNCTION = "save_images_with_metadata"
     CATEGORY = f"{CATEGORY_PREFIX}/Image"
     OUTPUT_NODE = True
+    # Lists are accepted so `captions` and `metadata_json` can carry one value per image or frame
+    INPUT_IS_LIST = True
+    OUTPUT_IS_LIST = (True, False)
 
     def save_images_with_metadata(self, images, save_directory, filename_prefix, save_workflow,
-                                  metadata_json, compression_level=4, captions="", prompt=None, extra_pnginfo=None):
-        save_directory = save_directory.strip()
-        filename_prefix = filename_prefix.strip()
+                                  metadata_json, compression_level=4, captions="", writer_workers=0,
+                                  background_write=False, file_format="png", quality=90,
+                                  deferred_compression=False, deferred_level=9, sidecar_mode="per_file",
+                                  prompt=None, extra_pnginfo=None):
+        # images, captions and metadata_json may carry one value per batch or frame; the rest must agree
+        save_directory = (_single(save_directory, "save_directory") or "").strip()
+        filename_prefix = (_single(filename_prefix, "filename_prefix") or "").strip()
+        save_workflow = _single(save_workflow, "save_workflow")
+        compression_level = _single(compression_level, "compression_level")
+        writer_workers = _single(writer_workers, "writer_workers")
+        background_write, file_format = _single(background_write, "background_write"), _single(file_format, "file_format")
+        quality, sidecar_mode = _single(quality, "quality"), _single(sidecar_mode, "sidecar_mode")
+        deferred_compression = _single(deferred_compression, "deferred_compression")
+        deferred_level = _single(deferred_level, "deferred_level")
+        extra_pnginfo = _first(extra_pnginfo)
         if not save_directory: raise ValueError("Directory cannot be empty")
         if not filename_prefix: raise ValueError("Prefix cannot be empty")
 
-        metadata_dict = {}
-        try:
-            parsed = json.loads(metadata_json.strip())
-            if isinstance(parsed, dict): metadata_dict = parsed
-        except json.JSONDecodeError:
-            pass
+        image_batches = images if isinstance(images, list) else [images]
+        frames = [batch[i] for batch in image_batches for i in range(batch.shape[0])]
+        frame_captions = [(c or "").strip() for c in self._align_per_frame(captions, image_batches, len(frames), "captions")]
+        frame_metadata = self._align_per_frame(metadata_json, image_batches, len(frames), "metadata_json")
+
+        if not is_format_available(file_format):
+            raise ValueError(f"Output format '{file_format}' is not supported by this Pillow build "
+                             f"(available: {', '.join(available_formats())})")
+        extension = FORMATS[file_format][1]
 
         output_dir = Path(save_directory)
         output_dir.mkdir(parents=True, exist_ok=True)
-        next_number = self._get_next_number(output_dir, filename_prefix)
+
+        # Text metadata is serialized (and compressed) once per distinct metadata_json and shared by its frames
+        encoded = {}
+        for raw in frame_metadata:
+            if raw in encoded:
+                continue
+            metadata_dict = self._parse_metadata_json(raw)
+            if file_format == "png":
+                encoded[raw] = (metadata_dict, build_pnginfo(save_workflow, extra_pnginfo, metadata_dict), None, None)
+            else:
+                encoded[raw] = (metadata_dict, None) + self._build_exif(file_format, save_workflow, extra_pnginfo,
+                                                                        metadata_dict)
+        overflow_keys = sorted({k for entry in encoded.values() if entry[3] for k in json.loads(entry[3])})
+
+        # Numbers are claimed (hidden lock files) before any job starts, so parallel and
+        # background writes keep deterministic names and never collide with other writers
+        per_file_captions = sidecar_mode == "per_file"
+        sidecars = (".txt",) if per_file_captions and any(frame_captions) else ()
+        if overflow_keys:
+            sidecars += (METADATA_SIDECAR,)
+        numbers = reserve_numbers(output_dir, filename_prefix, extension, len(frames), sidecars=sidecars)
 
         saved_paths = []
-        has_captions = bool(captions.strip())
+        jobs = []
+
+        for frame, idx, caption, raw in zip(frames, numbers, frame_captions, frame_metadata):
+            _, pnginfo, exif, overflow = encoded[raw]
+            save_path = output_dir / f"{filename_prefix}_{idx:05d}{extension}"
+            caption_path = output_dir / f"{filename_prefix}_{idx:05d}.txt" if per_file_captions and caption else None
+            overflow_path = metadata_sidecar_path(save_path) if overflow else None
+            release = functools.partial(release_numbers, output_dir, filename_prefix, [idx])
+            jobs.append(functools.partial(self._write_frame, frame, save_path, file_format, compression_level,
+                                          quality, pnginfo, exif, caption, caption_path, overflow, overflow_path,
+                                          release))
+            saved_paths.append(str(save_path))
 
-        for i in range(images.shape[0]):
-            idx = next_number + i
-            filename = f"{filename_prefix}_{idx:05d}.png"
-            save_path = output_dir / filename
+        # One manifest per batch instead of N small sidecars
+        sidecar_jobs = []
+        if sidecar_mode == "manifest":
+            manifest_path = output_dir / f"{filename_prefix}_{numbers[0]:05d}-{numbers[-1]:05d}.jsonl"
+            records = [{"path": path, "caption": caption, "metadata": encoded[raw][0]}
+                       for path, caption, raw in zip(saved_paths, frame_captions, frame_metadata)]
+            sidecar_jobs.append(functools.partial(self._write_manifest, manifest_path, records))
+
+        details = {"Count": len(saved_paths), "Path": str(output_dir), "Format": file_format,
+                   "Sidecars": sidecar_mode, "Workers": writer_workers or os.cpu_count()}
+        if overflow_keys:
+            details["Metadata Sidecar"] = f"{', '.join(overflow_keys)} -> *{METADATA_SIDECAR} (EXIF too small)"
+        compact = deferred_compression and file_format == "png" and deferred_level > compression_level
+        on_written = (lambda: PngCompactor().enqueue(saved_paths, deferred_level)) if compact else None
+
+        if background_write:
+            BackgroundWriter().submit_batch(jobs + sidecar_jobs, on_complete=on_written)
+        else:
+            results = run_pipelined(jobs + sidecar_jobs, writer_workers)[:len(jobs)]
+            if on_written is not None:
+                on_written()
+            encode_s = sum(r[1] for r in results)
+            total_bytes = sum(r[2] for r in results)
+            details.update({
+                "Encode": f"{encode_s * 1000.0 / len(results):.1f} ms/frame",
+                "Size": f"{total_bytes / len(results) / 1024.0:.1f} KB/frame ({total_bytes / 1048576.0:.2f} MB total)",
+            })
+
+        log(LogEntry(node_class="ImageSaveWithMetadata", title="Queued" if background_write else "Saved",
+                     details=details))
+        return (image_batches, ", ".join(saved_paths) if len(saved_paths) > 1 else saved_paths[0])
+
+    def _align_per_frame(self, values, image_batches, frame_count, name):
+        """One value per frame: a single value is broadcast, one per batch is repeated per frame."""
+        if values is None:
+            values = [""]
+        elif not isinstance(values, list):
+            values = [values]
+
+        if len(values) == frame_count:
+            return values
+        if len(values) == 1:
+            return values * frame_count
+        if len(values) == len(image_batches):
+            return [v for v, batch in zip(values, image_batches) for _ in range(batch.shape[0])]
+        raise ValueError(f"{name} has {len(values)} entries but the batch has {frame_count} frames")
+
+    def _parse_metadata_json(self, raw):
+        try:
+            parsed = json.loads((raw or "").strip())
+            if isinstance(parsed, dict): return parsed
+        except json.JSONDecodeError:
+            pass
+        return {}
 
-            img_np = (images[i].cpu().numpy() * 255.0).clip(0, 255).astype(np.uint8)
+    def _write_frame(self, image, save_path, file_format, compression_level, quality, pnginfo, exif, caption,
+                     caption_path, overflow, overflow_path, release):
+        """Write one frame (and its sidecars), then release its reserved number whatever happens."""
+        try:
+            img_np = tensor_to_uint8(image).numpy()
             if img_np.shape[2] == 4:
                 img_pil = Image.fromarray(img_np, mode="RGBA")
             elif img_np.shape[2] == 3:
@@ -313,43 +598,45 @@ class ImageSaveWithMetadata:
             else:
                 raise ValueError(f"Unsupported channels: {img_np.shape[2]}")
 
-            pnginfo = PngImagePlugin.PngInfo()
-            if save_workflow and extra_pnginfo:
-                for k, v in extra_pnginfo.items():
-                    pnginfo.add_text(k, json.dumps(v))
-
-            if metadata_dict:
-                meta_str = json.dumps(metadata_dict, ensure_ascii=False, separators=(',', ':'))
-                key = "comfy_metadata" if len("comfy_metadata") <= 79 else "metadata"
-                if len(meta_str) > 1024:
-                    (pnginfo.add_ztxt if hasattr(pnginfo, 'add_ztxt') else pnginfo.add_text)(key, meta_str)
-                elif any(ord(c) > 127 for c in meta_str):
-                    (pnginfo.add_itxt if hasattr(pnginfo, 'add_itxt') else pnginfo.add_text)(key, meta_str, lang="", tkey="")
-                else:
-                    pnginfo.add_text(key, meta_str)
-
-            img_pil.save(save_path, format="PNG", pnginfo=pnginfo, compress_level=compression_level)
-            saved_paths.append(str(save_path))
-
-            if has_captions:
-                try:
-                    with open(output_dir / f"{filename_prefix}_{idx:05d}.txt", 'w', encoding='utf-8') as f:
-                        f.write(captions.strip())
-                except Exception:
-                    pass
-
-        log(LogEntry(node_class="ImageSaveWithMetadata", title="Saved",
-                     details={"Count": len(saved_paths), "Path": str(output_dir)}))
-        return (images, ", ".join(saved_paths) if len(saved_paths) > 1 else saved_paths[0])
-
-    def _get_next_number(self, directory, prefix):
-        pattern = re.compile(rf'^{re.escape(prefix)}_(\d{{5}})\.png$', re.IGNORECASE)
-        max_num = 0
+            start = time.perf_counter()
+            atomic_write(save_path, lambda tmp: save_image(img_pil, tmp, file_format, compression_level, quality,
+                                                           pnginfo=pnginfo, exif=exif))
+            encode_s = time.perf_counter() - start
+
+            if overflow_path is not None:
+                # Not best-effort like captions: without it the file would lose its workflow
+                atomic_write(overflow_path, lambda tmp: Path(tmp).write_text(overflow, encoding="utf-8"))
+            if caption_path is not None:
+                self._write_text(caption_path, caption)
+        finally:
+            release()
+        return save_path, encode_s, os.path.getsize(save_path)
+
+    def _write_manifest(self, manifest_path, records):
+        self._write_text(manifest_path, "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records))
+        return manifest_path
+
+    def _write_text(self, path, text):
+        def write(tmp):
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.write(text)
         try:
-            for entry in directory.iterdir():
-                if entry.is_file() and entry.suffix.lower() == '.png':
-                    match = pattern.match(entry.name)
-                    if match: max_num = max(max_num, int(match.group(1)))
-        except Exception:
-            pass
-        return max_num + 1
\ No newline at end of file
+            atomic_write(path, write)
+        except Exception as e:
+            log(LogEntry(node_class="ImageSaveWithMetadata", title="Sidecar write failed",
+                         details={"File": os.path.basename(path), "Error": str(e)}))
+
+    def _build_exif(self, file_format, save_workflow, extra_pnginfo, metadata_dict):
+        """
+        Returns:
+            (exif bytes or None, JSON text of the entries that did not fit, or None)
+        """
+        limit = JPEG_EXIF_LIMIT if file_format == "jpeg" else None
+        items = exif_text_items(save_workflow, extra_pnginfo, metadata_dict)
+        exif, dropped = build_exif(items, limit)
+        if not dropped:
+            return exif, None
+        log(LogEntry(node_class="ImageSaveWithMetadata", title="Metadata moved to sidecar",
+                     details={"Format": file_format, "Keys": ", ".join(dropped),
+                              "Reason": "EXIF size limit" if limit else "Too many entries"}))
+        return exif, json.dumps({k: v for k, v in items if k in dropped}, ensure_ascii=False)
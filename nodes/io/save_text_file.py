@@ -3,6 +3,7 @@ import re
 from datetime import datetime
 from ...common.constants import CATEGORY_PREFIX
 from ...common.logger import LogEntry, log
+from ...common.numbering import reserve_numbers, numbered_name, release_numbers
 
 class SaveTextFile:
     @classmethod
@@ -59,18 +60,11 @@ class SaveTextFile:
             return now.strftime(py_fmt)
         return re.sub(r"%date:([^%]+)%", replace_match, path_template)
 
-    def _get_next_numbered_filename(self, directory: str, base_name: str, extension: str) -> str:
-        """Find next available filename with pattern: base_name_00001.ext."""
+    def _get_next_numbered_filename(self, directory: str, base_name: str, extension: str):
+        """Reserve next available filename with pattern: base_name_00001.ext. Returns (filename, reserved number)."""
         if not extension.startswith("."): extension = "." + extension
-        pattern = re.compile(rf"^{re.escape(base_name)}_(\d+){re.escape(extension)}$")
-        existing_numbers = []
-        try:
-            for filename in os.listdir(directory):
-                match = pattern.match(filename)
-                if match: existing_numbers.append(int(match.group(1)))
-        except FileNotFoundError: pass
-        next_num = max(existing_numbers, default=0) + 1
-        return f"{base_name}_{next_num:05d}{extension}"
+        next_num = reserve_numbers(directory, base_name, extension)[0]
+        return numbered_name(base_name, next_num, extension), next_num
 
     def _strip_existing_extension(self, filename: str) -> str:
         """Remove existing extension from filename if present."""
@@ -102,20 +96,25 @@ class SaveTextFile:
             output_dir = os.path.join(formatted_root, formatted_folder) if formatted_folder else formatted_root
             os.makedirs(output_dir, exist_ok=True)
 
+            reserved = None
             if use_numbering:
-                final_filename = self._get_next_numbered_filename(output_dir, formatted_filename, extension)
+                final_filename, reserved = self._get_next_numbered_filename(output_dir, formatted_filename, extension)
                 log(LogEntry(node_class="SaveTextFile", title="Numbering enabled", details={"Filename": final_filename}))
             else:
                 if self._file_exists(output_dir, formatted_filename, extension):
-                    final_filename = self._get_next_numbered_filename(output_dir, formatted_filename, extension)
+                    final_filename, reserved = self._get_next_numbered_filename(output_dir, formatted_filename, extension)
                     log(LogEntry(node_class="SaveTextFile", title="Auto-numbering applied", details={"Filename": final_filename, "Reason": "File exists"}))
                 else:
                     final_filename = f"{formatted_filename}{extension}"
                     log(LogEntry(node_class="SaveTextFile", title="Exact filename used", details={"Filename": final_filename}))
 
             full_path = os.path.join(output_dir, final_filename)
-            with open(full_path, "w", encoding="utf-8") as f:
-                f.write(text)
+            try:
+                with open(full_path, "w", encoding="utf-8") as f:
+                    f.write(text)
+            finally:
+                if reserved is not None:
+                    release_numbers(output_dir, formatted_filename, [reserved])
 
             log(LogEntry(node_class="SaveTextFile", title="File saved successfully", details={"Path": full_path}))
             return {"ui": {}}
@@ -4,7 +4,6 @@ import re
 import tempfile
 import time
 
-import numpy as np
 import torch
 
 from PIL import Image
@@ -21,6 +20,7 @@ from llama_cpp.llama_chat_format import (
 
 from ...config.config_manager import ConfigManager
 from ...common.constants import CATEGORY_PREFIX
+from ...common.images import tensor_to_uint8
 from ...common.logger import (
     LogEntry,
     log_end,
@@ -161,18 +161,19 @@ class LlamaCppTextGenerator:
         if image is None:
             return None
 
-        img = image[0].cpu().numpy()
-        if len(img.shape) == 4:
+        img = image[0]
+        if img.dim() == 4:
             img = img[0]
 
         if img.shape[0] in (1, 3, 4):
-            img = np.transpose(img, (1, 2, 0))
+            img = img.permute(1, 2, 0)
 
-        img = np.clip(img * 255.0, 0, 255).astype(np.uint8)
+        # Only the selected frame is scaled (on its own device) and copied to the host
+        img = tensor_to_uint8(img)
         if img.shape[-1] == 4:
             img = img[:, :, :3]
 
-        pil = Image.fromarray(img).convert("RGB")
+        pil = Image.fromarray(img.numpy()).convert("RGB")
 
         max_size = 1024
         if pil.width > max_size or pil.height > max_size:
@@ -0,0 +1,285 @@
+import atexit
+import functools
+import os
+import threading
+import time
+from pathlib import Path
+from ...common.constants import CATEGORY_PREFIX
+from ...common.logger import LogEntry, log
+from ...common.ffmpeg import FFmpegStream, format_feed_stats, rgb24_chunk, run_ffmpeg
+from ...common.yuv import color_tag_args, yuv420p_chunk
+from ...common.video_presets import CODECS, SPEEDS, codec_args, output_args
+from .save_video_with_metadata import check_encoders, metadata_args, write_cover
+
+try:
+    from comfy.utils import ProgressBar
+    from comfy import model_management
+except ImportError:
+    ProgressBar = None
+    model_management = None
+
+# session_id -> _StreamSession; encoders stay open between queue runs
+_SESSIONS = {}
+_SESSIONS_LOCK = threading.Lock()
+
+
+def _interrupted():
+    return model_management is not None and model_management.processing_interrupted()
+
+
+class _StreamSession:
+    """One open encoder writing to a hidden partial file until finalized."""
+
+    def __init__(self, session_id, stream, video_path, partial_path, container, size, convert, tag_args,
+                 cover_temp):
+        self.session_id = session_id
+        self.stream = stream
+        self.video_path = video_path
+        self.partial_path = partial_path
+        self.container = container
+        self.size = size
+        self.convert = convert
+        self.tag_args = tag_args
+        self.cover_temp = cover_temp
+        self.batches = 0
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+
+    def cleanup(self):
+        if self.cover_temp and self.cover_temp.exists():
+            self.cover_temp.unlink()
+
+    def abort(self):
+        self.stream.terminate()
+        self.partial_path.unlink(missing_ok=True)
+        self.cleanup()
+
+
+def _pop_session(session_id):
+    with _SESSIONS_LOCK:
+        return _SESSIONS.pop(session_id, None)
+
+
+@atexit.register
+def _abort_open_sessions():
+    with _SESSIONS_LOCK:
+        sessions = list(_SESSIONS.values())
+        _SESSIONS.clear()
+    for session in sessions:
+        session.abort()
+
+
+class SaveVideoStream:
+    """
+    Appends image batches to an ffmpeg encoder kept open across queue runs.
+    The first call for a session id starts the encoder, every call pipes its batch,
+    and the finalize call closes the file and embeds metadata.
+    """
+
+    @classmethod
+    def IS_CHANGED(cls, **kwargs):
+        return float("nan")
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "images": ("IMAGE",),
+                "session_id": ("STRING", {"default": "video",
+                               "tooltip": "Calls with the same id append to the same open encoder"}),
+                "action": (["append", "finalize", "abort"], {"default": "append",
+                           "tooltip": "append = pipe this batch; finalize = pipe it and close the video; "
+                                      "abort = discard the open session"}),
+                "output_path": ("STRING", {"default": "./output/"}),
+                "filename": ("STRING", {"default": "final_video"}),
+                "fps": ("FLOAT", {"default": 24.0, "min": 12.0, "max": 60.0, "step": 1.0}),
+                "quality": (["lossless", "high", "medium"], {"default": "lossless"}),
+            },
+            "optional": {
+                "cover_image": ("IMAGE",),
+                "title": ("STRING", {"default": ""}),
+                "artist": ("STRING", {"default": ""}),
+                "album": ("STRING", {"default": ""}),
+                "comment": ("STRING", {"default": ""}),
+                "genre": ("STRING", {"default": ""}),
+                "creation_time": ("STRING", {"default": ""}),
+                "copyright": ("STRING", {"default": ""}),
+                "yuv_conversion": (["ffmpeg", "bt709", "bt601"], {"default": "ffmpeg"}),
+                "codec": (list(CODECS), {"default": "libx264"}),
+                "speed": (list(SPEEDS), {"default": "auto"}),
+                "crf": ("INT", {"default": -1, "min": -1, "max": 63}),
+                "threads": ("INT", {"default": 0, "min": 0, "max": 256}),
+            }
+        }
+
+    RETURN_TYPES = ("STRING", "INT")
+    RETURN_NAMES = ("video_path", "frames_written")
+    FUNCTION = "write_batch"
+    CATEGORY = f"{CATEGORY_PREFIX}/Production"
+    OUTPUT_NODE = True
+
+    def write_batch(self, images, session_id, action, output_path, filename, fps, quality, cover_image=None,
+                    title="", artist="", album="", comment="", genre="", creation_time="", copyright="",
+                    yuv_conversion="ffmpeg", codec="libx264", speed="auto", crf=-1, threads=0, **kwargs):
+        tag_args = metadata_args(title=title, artist=artist, album=album, comment=comment, genre=genre,
+                                 creation_time=creation_time, copyright=copyright)
+
+        if action == "abort":
+            session = _pop_session(session_id)
+            if session is None:
+                return ("", 0)
+            with session.lock:
+                session.abort()
+            log(LogEntry(node_class="SaveVideoStream", title="Session aborted",
+                         details={"Session": session_id, "Frames Discarded": session.stream.frames}))
+            return ("", 0)
+
+        with _SESSIONS_LOCK:
+            session = _SESSIONS.get(session_id)
+            if session is None:
+                session = self._open(session_id, images, output_path, filename, fps, quality, cover_image,
+                                     tag_args, yuv_conversion, codec, speed, crf, threads)
+                _SESSIONS[session_id] = session
+
+        with session.lock:
+            self._append(session, images)
+            if action == "finalize":
+                _pop_session(session_id)
+                return self._finalize(session, tag_args, cover_image)
+
+        log(LogEntry(node_class="SaveVideoStream", title="Batch appended", details={
+            "Session": session_id,
+            "Frames": f"+{images.shape[0]} ({session.stream.frames} total)",
+        }))
+        return (str(session.video_path), session.stream.frames)
+
+    def _open(self, session_id, images, output_path, filename, fps, quality, cover_image, tag_args,
+              yuv_conversion, codec, speed, crf, threads):
+        """Start the encoder; encode settings, cover and tags are fixed by the first batch."""
+        check_encoders(codec, quality)
+        codec_options, pix_fmt, container = codec_args(codec, quality, speed, crf, threads)
+
+        output_dir = Path(output_path).resolve()
+        output_dir.mkdir(parents=True, exist_ok=True)
+        video_path = output_dir / f"{filename}{container}"
+        # Dot-prefixed so directory watchers ignore the file until it is complete
+        partial_path = output_dir / f".{filename}.partial{container}"
+
+        height, width = images.shape[1:3]
+        input_pix_fmt, convert = "rgb24", rgb24_chunk
+        if yuv_conversion != "ffmpeg":
+            if pix_fmt == "yuv420p" and height % 2 == 0 and width % 2 == 0:
+                input_pix_fmt = "yuv420p"
+                convert = functools.partial(yuv420p_chunk, matrix=yuv_conversion)
+                codec_options += color_tag_args(yuv_conversion)
+            else:
+                log(LogEntry(node_class="SaveVideoStream", title="Client YUV conversion skipped",
+                             details={"Reason": f"needs yuv420p output and even size (got {pix_fmt}, {width}x{height})"}))
+
+        input_args = [
+            "-f", "rawvideo", "-pix_fmt", input_pix_fmt,
+            "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+        ]
+        # The cover file is read by ffmpeg as a second input, so it lives as long as the session
+        cover_temp = write_cover(cover_image, node_class="SaveVideoStream")
+        cover_inputs, out_args, cover_embedded = output_args(container, codec_options, cover_temp)
+        if cover_temp and not cover_embedded:
+            log(LogEntry(node_class="SaveVideoStream", title="Cover image skipped",
+                         details={"Reason": f"{container} cannot store a cover picture"}))
+        cmd = ["ffmpeg", "-y"] + input_args + cover_inputs + out_args + tag_args + [str(partial_path)]
+
+        stream = FFmpegStream(cmd)
+        log(LogEntry(node_class="SaveVideoStream", title="Session opened", details={
+            "Session": session_id,
+            "Codec": codec,
+            "Quality": quality,
+            "Size": f"{width}x{height}",
+            "Output": str(video_path),
+            "FPS": fps,
+        }))
+        return _StreamSession(session_id, stream, video_path, partial_path, container, (height, width), convert,
+                              tag_args, cover_temp)
+
+    def _append(self, session, images):
+        """Pipe one batch into the open encoder; a failure or interrupt discards the whole session."""
+        if tuple(images.shape[1:3]) != session.size:
+            raise ValueError(f"Session '{session.session_id}' encodes {session.size[1]}x{session.size[0]} frames, "
+                             f"got {images.shape[2]}x{images.shape[1]}")
+        if not session.stream.alive:
+            self._fail(session, "ffmpeg exited before the batch was written")
+
+        total = images.shape[0]
+        base = session.stream.frames
+        bar = ProgressBar(total) if ProgressBar is not None else None
+        if bar is not None:
+            session.stream.on_progress = lambda frame, fps: bar.update_absolute(min(total, max(0, frame - base)), total)
+        try:
+            stats = session.stream.write(images, session.convert, should_stop=_interrupted)
+        finally:
+            session.stream.on_progress = None
+
+        if stats["stopped"]:
+            _pop_session(session.session_id)
+            session.abort()
+            log(LogEntry(node_class="SaveVideoStream", title="Session interrupted",
+                         details={"Session": session.session_id, "Removed": str(session.partial_path)}))
+            if model_management is not None:
+                model_management.throw_exception_if_processing_interrupted()
+            raise RuntimeError("Video stream interrupted")
+        if stats["broken_pipe"]:
+            self._fail(session, "ffmpeg closed its input")
+        session.batches += 1
+        log(LogEntry(node_class="SaveVideoStream", title="Frames piped",
+                     details={"Frames": stats["frames"], **format_feed_stats(stats)}))
+
+    def _fail(self, session, reason):
+        _pop_session(session.session_id)
+        stderr = session.stream.stderr
+        session.abort()
+        raise RuntimeError(f"Video stream '{session.session_id}' failed: {reason}\n{stderr[-500:]}")
+
+    def _finalize(self, session, tag_args, cover_image):
+        """
+        Close the encoder. The first batch's tags and cover are already in the file; a cover
+        first supplied now or tags that changed since are added by a stream-copy remux.
+        """
+        try:
+            returncode = session.stream.close()
+            if returncode != 0:
+                session.partial_path.unlink(missing_ok=True)
+                raise RuntimeError(f"ffmpeg exited with code {returncode}\n{session.stream.stderr[-500:]}")
+
+            late_cover = session.cover_temp is None and cover_image is not None
+            if late_cover:
+                session.cover_temp = write_cover(cover_image, node_class="SaveVideoStream")
+            if tag_args == session.tag_args and not late_cover:
+                os.replace(session.partial_path, session.video_path)
+                mode = "closed"
+            else:
+                self._remux(session, tag_args)
+                mode = "closed + metadata remux"
+        finally:
+            session.partial_path.unlink(missing_ok=True)
+            session.cleanup()
+
+        elapsed = time.perf_counter() - session.started
+        log(LogEntry(node_class="SaveVideoStream", title="Video saved", details={
+            "Session": session.session_id,
+            "Path": str(session.video_path),
+            "Mode": mode,
+            "Frames": f"{session.stream.frames} in {session.batches} batches",
+            "Session Time": f"{elapsed:.2f} s",
+            "Size": f"{session.video_path.stat().st_size / 1048576.0:.1f} MB",
+        }))
+        return (str(session.video_path), session.stream.frames)
+
+    def _remux(self, session, tag_args):
+        cover_inputs, remux_args, _ = output_args(session.container, ["-c:v:0", "copy"], session.cover_temp)
+        # Drop the streaming-phase tags so only the final ones end up in the file
+        cmd = ["ffmpeg", "-y", "-i", str(session.partial_path)] + cover_inputs + remux_args
+        cmd += ["-map_metadata", "-1"] + tag_args
+        cmd += [str(session.video_path)]
+        result = run_ffmpeg(cmd)
+        if result["returncode"] != 0:
+            session.video_path.unlink(missing_ok=True)
+            raise RuntimeError(f"FFmpeg failed: {result['stderr'][-500:]}")
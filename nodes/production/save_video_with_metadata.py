@@ -1,11 +1,116 @@
-import subprocess
+import math
+import os
+import shutil
 import tempfile
-import numpy as np
 import json
+import functools
+import threading
+import time
+import torch
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from PIL import Image
 from ...common.constants import CATEGORY_PREFIX
 from ...common.logger import LogEntry, log
+from ...common.images import tensor_to_uint8
+from ...common.ffmpeg import (ffmpeg_at_least, ffmpeg_encoders, format_feed_stats, rgb24_chunk, run_ffmpeg, vfr_args,
+                              video_packet_times)
+from ...common.frame_diff import (FrameSelection, dropped_runs, duplicate_mask, timecodes_v2, vfr_duration_bsf,
+                                  vfr_filter)
+from ...common.yuv import color_tag_args, yuv420p_chunk
+from ...common.video_presets import (AUDIO_CODECS, CODECS, PREVIEWS, SPEEDS, audio_args, codec_args, output_args,
+                                      preview_args, required_encoders)
+
+try:
+    from comfy.utils import ProgressBar
+    from comfy import model_management
+except ImportError:
+    ProgressBar = None
+    model_management = None
+
+# Seconds between "Encoding" log lines
+_PROGRESS_LOG_INTERVAL = 5.0
+
+
+def _interrupted():
+    return model_management is not None and model_management.processing_interrupted()
+
+
+class _EncodeInterrupted(Exception):
+    pass
+
+
+class _EncodeProgress:
+    """Folds ffmpeg -progress reports (one stream per process) into the ComfyUI progress bar."""
+
+    def __init__(self, total):
+        self.total = total
+        self.done = {}
+        self.lock = threading.Lock()
+        self.start = time.perf_counter()
+        self.last_log = self.start
+        self.bar = ProgressBar(total) if ProgressBar is not None else None
+
+    def update(self, key, frame, fps):
+        with self.lock:
+            self.done[key] = frame
+            done = min(self.total, sum(self.done.values()))
+            now = time.perf_counter()
+            should_log = now - self.last_log >= _PROGRESS_LOG_INTERVAL
+            if should_log:
+                self.last_log = now
+        if self.bar is not None:
+            self.bar.update_absolute(done, self.total)
+        if should_log:
+            rate = done / max(now - self.start, 1e-9)
+            eta = (self.total - done) / rate if rate > 0 else float("inf")
+            log(LogEntry(node_class="SaveVideoWithMetadata", title="Encoding", details={
+                "Frame": f"{done}/{self.total}",
+                "FPS": f"{rate:.1f}" + (f" (ffmpeg {fps:.1f})" if len(self.done) == 1 and fps else ""),
+                "ETA": f"{eta:.0f} s" if eta != float("inf") else "n/a",
+            }))
+
+
+def check_encoders(codec, quality):
+    """Raise ValueError if the local ffmpeg cannot run this codec/quality selection."""
+    missing = [name for name in required_encoders(codec, quality) if name not in ffmpeg_encoders()]
+    if missing:
+        available = [name for name in CODECS if all(e in ffmpeg_encoders() for e in required_encoders(name, quality))]
+        raise ValueError(f"Local ffmpeg lacks encoder {', '.join(missing)}; available: {', '.join(available)}")
+
+
+def write_cover(cover_image, node_class="SaveVideoWithMetadata"):
+    """Save the first cover frame as a temp JPEG; returns its path or None."""
+    if cover_image is None or len(cover_image) == 0:
+        return None
+    try:
+        img_np = tensor_to_uint8(cover_image[0, :, :, :3]).numpy()
+        with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as tmp:
+            cover_temp = Path(tmp.name)
+        pil_img = Image.fromarray(img_np, mode="RGB")
+        pil_img.save(cover_temp, "JPEG", quality=95)
+        return cover_temp
+    except Exception as e:
+        log(LogEntry(node_class=node_class, title="Cover image warning", details={"Error": str(e)}))
+        return None
+
+
+def metadata_args(**tags):
+    """-metadata options for every non-empty tag."""
+    def to_str(value):
+        if value is None: return ""
+        if isinstance(value, str): return value
+        if isinstance(value, (int, float, bool)): return str(value)
+        try: return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+        except: return str(value)
+
+    args = []
+    for key, value in tags.items():
+        s = to_str(value).strip()
+        if s:
+            args += ["-metadata", f"{key}={s}"]
+    return args
+
 
 class SaveVideoWithMetadata:
     """Encodes image batch to MP4 with embedded metadata and optional cover image."""
@@ -33,24 +138,62 @@ class SaveVideoWithMetadata:
                 "genre": ("STRING", {"default": ""}),
                 "creation_time": ("STRING", {"default": ""}),
                 "copyright": ("STRING", {"default": ""}),
+                "yuv_conversion": (["ffmpeg", "bt709", "bt601"], {"default": "ffmpeg",
+                                   "tooltip": "yuv420p presets: convert RGB->YUV before piping (half the pipe bytes) "
+                                              "with this matrix and tag the stream; ffmpeg = let ffmpeg convert"}),
+                "codec": (list(CODECS), {"default": "libx264",
+                          "tooltip": "Encoder; the container follows the codec (mp4, mkv or mov)"}),
+                "speed": (list(SPEEDS), {"default": "auto",
+                          "tooltip": "Encoder speed preset; auto = the quality level's default"}),
+                "crf": ("INT", {"default": -1, "min": -1, "max": 63,
+                        "tooltip": "Override the quality level's CRF (-1 = keep; ignored by ProRes/FFV1)"}),
+                "threads": ("INT", {"default": 0, "min": 0, "max": 256,
+                            "tooltip": "Encoder threads, 0 = ffmpeg default"}),
+                "parallel_segments": ("INT", {"default": 0, "min": 0, "max": 64,
+                                      "tooltip": "Split long batches at GOP boundaries and encode up to N segments "
+                                                 "concurrently, then join them without re-encoding (0/1 = off)"}),
+                "audio": ("AUDIO",),
+                "audio_path": ("STRING", {"default": "",
+                               "tooltip": "Audio file to mux when no AUDIO input is connected"}),
+                "audio_codec": (["auto"] + list(AUDIO_CODECS), {"default": "auto",
+                                "tooltip": "auto = aac (mp4), libopus (mkv), pcm_s16le (mov)"}),
+                "audio_bitrate": ("INT", {"default": 192, "min": 32, "max": 512, "step": 32,
+                                  "tooltip": "kbps for lossy audio codecs"}),
+                "preview_format": (["none"] + list(PREVIEWS), {"default": "none",
+                                   "tooltip": "Also write a downscaled animated preview next to the video, "
+                                              "encoded from the same frame stream"}),
+                "preview_width": ("INT", {"default": 320, "min": 64, "max": 1920, "step": 16}),
+                "preview_fps": ("FLOAT", {"default": 0.0, "min": 0.0, "max": 60.0, "step": 1.0,
+                                "tooltip": "0 = the video's frame rate"}),
+                "duplicate_frames": (["keep", "report", "drop"], {"default": "keep",
+                                     "tooltip": "Scan for static/duplicate consecutive frames: report = log them, "
+                                                "drop = skip them and keep the timing (VFR) plus a timestamp file"}),
+                "duplicate_threshold": ("FLOAT", {"default": 0.002, "min": 0.0, "max": 0.1, "step": 0.0005,
+                                        "tooltip": "Max mean abs difference (0-1) to the last kept frame; "
+                                                   "0 = exact duplicates only"}),
             }
         }
 
-    RETURN_TYPES = ("STRING",)
-    RETURN_NAMES = ("video_path",)
+    RETURN_TYPES = ("STRING", "STRING")
+    RETURN_NAMES = ("video_path", "preview_path")
     FUNCTION = "save_and_embed"
     CATEGORY = f"{CATEGORY_PREFIX}/Production"
     OUTPUT_NODE = True
 
-    def save_and_embed(self, images, output_path, filename, fps, quality, cover_image=None, title="", artist="", album="", comment="", genre="", creation_time="", copyright="", **kwargs):
+    def save_and_embed(self, images, output_path, filename, fps, quality, cover_image=None, title="", artist="", album="", comment="", genre="", creation_time="", copyright="", yuv_conversion="ffmpeg", codec="libx264", speed="auto", crf=-1, threads=0, parallel_segments=0, audio=None, audio_path="", audio_codec="auto", audio_bitrate=192, preview_format="none", preview_width=320, preview_fps=0.0, duplicate_frames="keep", duplicate_threshold=0.002, **kwargs):
+        check_encoders(codec, quality)
+        # Stream-qualified (v:0) so the options never reach the cover's mjpeg encoder
+        codec_options, pix_fmt, container = codec_args(codec, quality, speed, crf, threads)
+
         output_dir = Path(output_path).resolve()
         output_dir.mkdir(parents=True, exist_ok=True)
-        video_path = output_dir / f"{filename}.mp4"
+        video_path = output_dir / f"{filename}{container}"
 
         log(LogEntry(
             node_class="SaveVideoWithMetadata",
             title="Starting video export",
             details={
+                "Codec": codec,
                 "Quality": quality,
                 "Cover Image": cover_image is not None,
                 "Output": str(video_path),
@@ -58,86 +201,311 @@ class SaveVideoWithMetadata:
             }
         ))
 
-        # Prepare first frame for dimensions
-        first_img = images[0].cpu().numpy()
-        first_img = (first_img * 255.0).clip(0, 255).astype(np.uint8)
-        if first_img.shape[2] == 4:
-            first_img = first_img[:, :, :3]
-        height, width = first_img.shape[:2]
+        height, width = images.shape[1:3]
 
-        temp_video = video_path.with_suffix(".temp_raw.mp4")
-
-        # FFmpeg encoding presets
-        if quality == "lossless":
-            crf, preset, pix_fmt, codec = "0", "ultrafast", "rgb24", "libx264rgb"
-        elif quality == "high":
-            crf, preset, pix_fmt, codec = "17", "slow", "yuv420p", "libx264"
-        else:
-            crf, preset, pix_fmt, codec = "23", "medium", "yuv420p", "libx264"
+        input_pix_fmt, convert = "rgb24", rgb24_chunk
+        if yuv_conversion != "ffmpeg":
+            if pix_fmt == "yuv420p" and height % 2 == 0 and width % 2 == 0:
+                input_pix_fmt = "yuv420p"
+                convert = functools.partial(yuv420p_chunk, matrix=yuv_conversion)
+                codec_options += color_tag_args(yuv_conversion)
+            else:
+                log(LogEntry(node_class="SaveVideoWithMetadata", title="Client YUV conversion skipped",
+                             details={"Reason": f"needs yuv420p output and even size (got {pix_fmt}, {width}x{height})"}))
 
-        cmd1 = [
-            "ffmpeg", "-y",
-            "-f", "rawvideo", "-pix_fmt", "rgb24",
+        input_args = [
+            "-f", "rawvideo", "-pix_fmt", input_pix_fmt,
             "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
-            "-c:v", codec, "-crf", crf, "-preset", preset,
-            "-pix_fmt", pix_fmt, "-movflags", "+faststart",
-            str(temp_video)
         ]
+        duration = images.shape[0] / fps
+        pts_filter = None
+        if duplicate_frames != "keep" and images.shape[0] > 2:
+            images, pts_filter = self._scan_duplicates(images, duplicate_frames, duplicate_threshold, fps,
+                                                       output_dir / f"{filename}.timecodes.txt")
+        if pts_filter is not None:
+            codec_options += ["-filter:v:0", pts_filter] + vfr_args()
+            if ffmpeg_at_least(4, 4):
+                # setts arrived in ffmpeg 4.4; older builds may show the last frame for less than a frame
+                codec_options += ["-bsf:v:0", vfr_duration_bsf(fps)]
+            if parallel_segments > 1:
+                # Segments are cut by piped frame index, which no longer maps to time
+                log(LogEntry(node_class="SaveVideoWithMetadata", title="Segmented encoding skipped",
+                             details={"Reason": "duplicate_frames = drop"}))
+                parallel_segments = 0
+
+        preview_path, preview = None, []
+        if preview_format != "none":
+            preview_options, extension = preview_args(preview_format, width, preview_width, preview_fps, pts_filter)
+            preview_encoder = PREVIEWS[preview_format]["encoder"]
+            if preview_encoder not in ffmpeg_encoders():
+                raise ValueError(f"Local ffmpeg lacks encoder {preview_encoder} for {preview_format} previews")
+            preview_path = output_dir / f"{filename}.preview{extension}"
+            preview = preview_options + [str(preview_path)]
+
+        tag_args = metadata_args(title=title, artist=artist, album=album, comment=comment, genre=genre,
+                                 creation_time=creation_time, copyright=copyright)
+        cover_temp = write_cover(cover_image)
+        try:
+            audio_spec, audio_temp = self._prepare_audio(audio, audio_path, audio_codec, audio_bitrate, container,
+                                                         duration)
+        except Exception:
+            if cover_temp and cover_temp.exists():
+                cover_temp.unlink()
+            raise
+
+        start = time.perf_counter()
+        segment_stats = None
+        self._progress = _EncodeProgress(images.shape[0])
+        try:
+            if parallel_segments > 1:
+                segment_stats = self._encode_segmented(video_path, container, input_args, codec_options, tag_args,
+                                                       cover_temp, images, convert, parallel_segments, fps, threads,
+                                                       audio_spec, preview)
+            if segment_stats is None:
+                single_pass = self._encode_single_pass(video_path, container, input_args, codec_options,
+                                                       tag_args, cover_temp, images, convert, audio_spec, preview)
+        except _EncodeInterrupted:
+            # ffmpeg was terminated mid-write; temp files are removed by the inner finally blocks
+            video_path.unlink(missing_ok=True)
+            if preview_path is not None:
+                preview_path.unlink(missing_ok=True)
+            log(LogEntry(node_class="SaveVideoWithMetadata", title="Encode interrupted",
+                         details={"Removed": str(video_path)}))
+            if model_management is not None:
+                model_management.throw_exception_if_processing_interrupted()
+            raise RuntimeError("Video encode interrupted")
+        finally:
+            if cover_temp and cover_temp.exists():
+                cover_temp.unlink()
+            if audio_temp and audio_temp.exists():
+                audio_temp.unlink()
+
+        if preview_path is not None:
+            log(LogEntry(node_class="SaveVideoWithMetadata", title="Preview saved", details={
+                "Path": str(preview_path),
+                "Size": f"{preview_path.stat().st_size / 1024.0:.1f} KB",
+            }))
+        preview_result = str(preview_path) if preview_path is not None else ""
+        if segment_stats is not None:
+            return self._report_segmented(video_path, segment_stats, time.perf_counter() - start) + (preview_result,)
+
+        elapsed = time.perf_counter() - start
+        size_mb = video_path.stat().st_size / 1048576.0
+        details = {"Path": str(video_path), "Mode": "single-pass" if single_pass else "two-pass fallback",
+                   "Encode Time": f"{elapsed:.2f} s", "Size": f"{size_mb:.1f} MB"}
+        if single_pass:
+            # The two-pass path wrote a temp file of the same size, then read it back to remux
+            details["I/O Saved"] = f"{2 * size_mb:.1f} MB (temp write + remux read) and one ffmpeg run"
+        log(LogEntry(node_class="SaveVideoWithMetadata", title="Video saved", details=details))
+        return (str(video_path), preview_result)
+
+    def _encode_single_pass(self, video_path, container, input_args, codec_options, tag_args, cover_temp, images,
+                            convert, audio=None, preview=()):
+        """
+        Frames, audio, tags and cover go into the final file in one ffmpeg run, the preview (if any)
+        into a second output of the same run. Returns False if the fallback ran.
+        """
+        cover_inputs, out_args, cover_embedded = output_args(container, codec_options, cover_temp, audio)
+        if cover_temp and not cover_embedded:
+            log(LogEntry(node_class="SaveVideoWithMetadata", title="Cover image skipped",
+                         details={"Reason": f"{container} cannot store a cover picture"}))
+        cmd = ["ffmpeg", "-y"] + input_args + cover_inputs + out_args + tag_args + [str(video_path)] + list(preview)
+
+        returncode, stderr = self._pipe_frames(cmd, images, convert)
+        if returncode == 0:
+            return True
+        log(LogEntry(node_class="SaveVideoWithMetadata", title="Single-pass encode failed, using two-pass fallback",
+                     details={"Error": stderr[-500:]}))
+        self._encode_two_pass(video_path, container, input_args, codec_options, tag_args, cover_temp,
+                              images, convert, audio, preview)
+        return False
+
+    def _pipe_frames(self, cmd, images, convert=rgb24_chunk, key=0):
+        """
+        Run ffmpeg reading raw frames produced by `convert` from stdin.
+        Progress drives the ComfyUI bar under `key`; an interrupt terminates ffmpeg.
+        Returns:
+            (returncode, stderr tail)
+        """
+        result = run_ffmpeg(cmd, images, convert, on_progress=lambda frame, fps: self._progress.update(key, frame, fps),
+                            should_stop=_interrupted)
+        if result["interrupted"]:
+            raise _EncodeInterrupted()
+        stats = result["feed"]
+        log(LogEntry(node_class="SaveVideoWithMetadata", title="Frames piped",
+                     details={"Frames": stats["frames"], **format_feed_stats(stats)}))
+        return result["returncode"], result["stderr"]
+
+    def _run(self, cmd):
+        """Run an ffmpeg job without frame input (remux, concat); interrupts terminate it."""
+        result = run_ffmpeg(cmd, should_stop=_interrupted)
+        if result["interrupted"]:
+            raise _EncodeInterrupted()
+        return result
+
+    def _encode_segmented(self, video_path, container, input_args, codec_options, tag_args, cover_temp, images,
+                          convert, workers, fps, threads, audio=None, preview=()):
+        """
+        Encode GOP-aligned slices of the batch in concurrent ffmpeg processes and join them with the
+        concat demuxer (stream copy). Every segment starts on a keyframe at a multiple of the GOP, so
+        the joined stream has the keyframe cadence of a single encode. Segments are Matroska (no edit
+        lists or negative start times to trip the joins), and the joined file is checked for one
+        packet per frame at the single-encode timestamps.
+        Returns:
+            Stats dict, or None when the batch is too short to split or the joined file is off
+        """
+        total = images.shape[0]
+        gop = max(1, round(fps * 2))
+        per_segment = math.ceil(math.ceil(total / workers) / gop) * gop
+        bounds = [(s, min(s + per_segment, total)) for s in range(0, total, per_segment)]
+        if len(bounds) < 2:
+            return None
+
+        # Split the cores between workers unless the user pinned a thread count
+        thread_args = [] if threads > 0 else ["-threads:v:0", str(max(1, (os.cpu_count() or 1) // len(bounds)))]
+        segment_options = ["-g:v:0", str(gop)] + codec_options + thread_args
+        segment_dir = Path(tempfile.mkdtemp(prefix=f".{video_path.stem}.segments.", dir=video_path.parent))
+
+        def encode(index):
+            first, last = bounds[index]
+            segment = segment_dir / f"segment_{index:04d}.nut"
+            args = ["-map", "0:v:0"] + segment_options
+            t0 = time.perf_counter()
+            returncode, stderr = self._pipe_frames(["ffmpeg", "-y"] + input_args + args + [str(segment)],
+                                                   images[first:last], convert, key=index)
+            if returncode != 0:
+                raise RuntimeError(f"Segment {index} failed: {stderr[-1000:]}")
+            return segment, time.perf_counter() - t0
+
+        try:
+            t0 = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=len(bounds), thread_name_prefix="stalker-segment") as pool:
+                results = list(pool.map(encode, range(len(bounds))))
+            encode_wall = time.perf_counter() - t0
+
+            concat_list = segment_dir / "segments.txt"
+            with open(concat_list, "w", encoding="utf-8") as f:
+                for (segment, _), (first, last) in zip(results, bounds):
+                    escaped = str(segment).replace("'", "'\\''")
+                    # Offsets come from the listed length; encoders may leave the last packet without a duration
+                    f.write(f"file '{escaped}'\nduration {(last - first) / fps:.6f}\n")
+
+            cover_inputs, out_args, _ = output_args(container, ["-c:v:0", "copy"], cover_temp, audio)
+            cmd = ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", str(concat_list)]
+            # The preview decodes the joined stream here, so segment workers stay single-output
+            cmd += cover_inputs + out_args + tag_args + [str(video_path)] + list(preview)
+            t0 = time.perf_counter()
+            result = self._run(cmd)
+            if result["returncode"] != 0:
+                raise RuntimeError(f"Segment concat failed: {result['stderr'][-1000:]}")
+            concat_s = time.perf_counter() - t0
+        finally:
+            shutil.rmtree(segment_dir, ignore_errors=True)
+
+        pts = sorted(t for t, _ in video_packet_times(video_path))
+        if len(pts) != total or any(abs(t - i / fps) > 0.5 / fps for i, t in enumerate(pts)):
+            log(LogEntry(node_class="SaveVideoWithMetadata", title="Segmented encode rejected, using single pass",
+                         details={"Frames": f"{len(pts)} joined / {total} expected",
+                                  "Reason": "frame count or timestamps differ from a single encode"}))
+            return None
+
+        return {"frames": total, "segments": len(bounds), "gop": gop, "encode_wall": encode_wall,
+                "encode_serial": sum(t for _, t in results), "concat": concat_s}
+
+    def _report_segmented(self, video_path, stats, elapsed):
+        log(LogEntry(node_class="SaveVideoWithMetadata", title="Video saved", details={
+            "Path": str(video_path),
+            "Mode": f"segmented ({stats['segments']} segments, GOP {stats['gop']})",
+            "Encode Time": f"{elapsed:.2f} s ({stats['frames'] / max(elapsed, 1e-9):.1f} fps)",
+            "Concat": f"{stats['concat']:.2f} s",
+            # Sum of per-segment encode times over their wall time: how many encoders ran at once on average.
+            # Not a speedup: contention slows every segment down and still raises it
+            "Segment Concurrency": f"{stats['encode_serial'] / max(stats['encode_wall'], 1e-9):.2f}x",
+            "Size": f"{video_path.stat().st_size / 1048576.0:.1f} MB",
+        }))
+        return (str(video_path),)
+
+    def _encode_two_pass(self, video_path, container, input_args, codec_options, tag_args, cover_temp, images,
+                         convert=rgb24_chunk, audio=None, preview=()):
+        """Fallback: encode to a temp file, then remux it with audio, tags and cover."""
+        temp_video = video_path.with_suffix(".temp_raw" + video_path.suffix)
+        try:
+            _, encode_args, _ = output_args(container, codec_options)
+            cmd1 = ["ffmpeg", "-y"] + input_args + encode_args + [str(temp_video)] + list(preview)
+            returncode, stderr = self._pipe_frames(cmd1, images, convert)
+            if returncode != 0:
+                raise RuntimeError(f"Recording failed: {stderr}")
+
+            cover_inputs, remux_args, _ = output_args(container, ["-c:v:0", "copy"], cover_temp, audio)
+            cmd2 = ["ffmpeg", "-y", "-i", str(temp_video)] + cover_inputs + remux_args + tag_args
+            cmd2 += [str(video_path)]
+            result = self._run(cmd2)
+            if result["returncode"] != 0:
+                raise RuntimeError(f"FFmpeg failed: {result['stderr']}")
+        finally:
+            if temp_video.exists():
+                temp_video.unlink()
+
+    def _prepare_audio(self, audio, audio_path, audio_codec, audio_bitrate, container, duration):
+        """
+        Audio input and stream options for `output_args`. An AUDIO waveform is written once as raw
+        float32 (ffmpeg's stdin is taken by the frames); the track is fitted to `duration`.
+        Returns:
+            ((input args, stream args) or None, temp file to remove or None)
+        """
+        if audio is None and not audio_path.strip():
+            return None, None
+        encoder, stream_args = audio_args(audio_codec, container, audio_bitrate, duration)
+        if encoder not in ffmpeg_encoders():
+            raise ValueError(f"Local ffmpeg lacks audio encoder {encoder}")
 
-        proc = subprocess.Popen(cmd1, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
-        for i in range(images.shape[0]):
-            img = images[i].cpu().numpy()
-            img = (img * 255.0).clip(0, 255).astype(np.uint8)
-            if img.shape[2] == 4:
-                img = img[:, :, :3]
-            proc.stdin.write(img.tobytes())
-        _, stderr = proc.communicate()
-        if proc.returncode != 0:
-            raise RuntimeError(f"Recording failed: {stderr.decode()}")
-
-        # Embed metadata and cover
-        cmd2 = ["ffmpeg", "-y", "-i", str(temp_video)]
-
-        cover_temp = None
-        if cover_image is not None and len(cover_image) > 0:
-            try:
-                img_tensor = cover_image[0]
-                img_np = (img_tensor.cpu().numpy() * 255.0).clip(0, 255).astype(np.uint8)
-                if img_np.shape[2] == 4:
-                    img_np = img_np[:, :, :3]
-                with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as tmp:
-                    cover_temp = Path(tmp.name)
-                pil_img = Image.fromarray(img_np, mode="RGB")
-                pil_img.save(cover_temp, "JPEG", quality=95)
-                cmd2 += ["-i", str(cover_temp)]
-            except Exception as e:
-                log(LogEntry(node_class="SaveVideoWithMetadata", title="Cover image warning", details={"Error": str(e)}))
-
-        def to_str(value):
-            if value is None: return ""
-            if isinstance(value, str): return value
-            if isinstance(value, (int, float, bool)): return str(value)
-            try: return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
-            except: return str(value)
-
-        for key, value in [("title", title), ("artist", artist), ("album", album), ("comment", comment), ("genre", genre), ("creation_time", creation_time), ("copyright", copyright)]:
-            s = to_str(value).strip()
-            if s:
-                cmd2 += ["-metadata", f"{key}={s}"]
-
-        if cover_temp:
-            cmd2 += ["-map", "0", "-map", "1", "-c", "copy", "-c:v:1", "mjpeg", "-disposition:v:1", "attached_pic"]
+        audio_temp = None
+        if audio is not None:
+            waveform = audio["waveform"][0].detach().to("cpu", torch.float32)
+            channels, samples = waveform.shape
+            sample_rate = int(audio["sample_rate"])
+            with tempfile.NamedTemporaryFile(suffix=".f32le", delete=False) as tmp:
+                audio_temp = Path(tmp.name)
+                tmp.write(waveform.t().contiguous().numpy().tobytes())
+            inputs = ["-f", "f32le", "-ar", str(sample_rate), "-ac", str(channels), "-i", str(audio_temp)]
+            source, source_len = "AUDIO input", f"{samples / sample_rate:.2f} s"
         else:
-            cmd2 += ["-map", "0", "-c", "copy"]
+            path = Path(audio_path.strip()).expanduser()
+            if not path.is_file():
+                raise ValueError(f"Audio file not found: {path}")
+            inputs = ["-i", str(path)]
+            source, source_len = path.name, "n/a"
 
-        cmd2 += [str(video_path)]
-        result = subprocess.run(cmd2, capture_output=True, text=True)
-        if result.returncode != 0:
-            raise RuntimeError(f"FFmpeg failed: {result.stderr}")
+        log(LogEntry(node_class="SaveVideoWithMetadata", title="Audio track", details={
+            "Source": source,
+            "Codec": encoder,
+            "Source Length": source_len,
+            "Fitted To": f"{duration:.2f} s",
+        }))
+        return (inputs, stream_args), audio_temp
 
-        temp_video.unlink()
-        if cover_temp and cover_temp.exists():
-            cover_temp.unlink()
+    def _scan_duplicates(self, images, mode, threshold, fps, timecodes_path):
+        """
+        Batched mean-abs-diff pre-pass. `report` only logs duplicate runs; `drop` returns the kept
+        frames plus a filter restoring their original timestamps, and writes a v2 timestamp file.
+        Returns:
+            (images or FrameSelection, timestamp filter or None)
+        """
+        t0 = time.perf_counter()
+        keep, _ = duplicate_mask(images, threshold)
+        runs = dropped_runs(keep)
+        total, dropped = len(keep), int((~keep).sum())
+        log(LogEntry(node_class="SaveVideoWithMetadata", title="Duplicate frames", details={
+            "Mode": mode,
+            "Duplicates": f"{dropped}/{total} ({dropped / total * 100:.1f}%) in {len(runs)} runs",
+            "Longest Run": max((last - first + 1 for first, last in runs), default=0),
+            "Runs": ", ".join(f"{first}-{last}" for first, last in runs[:10]) + (" ..." if len(runs) > 10 else ""),
+            "Threshold": threshold,
+            "Scan Time": f"{(time.perf_counter() - t0) * 1000:.0f} ms",
+        }))
+        if mode != "drop" or dropped == 0:
+            return images, None
 
-        log(LogEntry(node_class="SaveVideoWithMetadata", title="Video saved", details={"Path": str(video_path)}))
-        return (str(video_path),)
\ No newline at end of file
+        with open(timecodes_path, "w", encoding="utf-8") as f:
+            f.write(timecodes_v2(keep, fps))
+        return FrameSelection(images, keep), vfr_filter(keep)
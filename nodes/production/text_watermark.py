@@ -1,9 +1,87 @@
+import functools
 import numpy as np
 import torch
-from PIL import Image, ImageDraw, ImageFont, ImageOps
+from PIL import Image, ImageDraw
 from ...common.constants import CATEGORY_PREFIX
 from ...common.logger import LogEntry, log
-from ...common.fonts import get_system_font_names, load_font, BIDI_AVAILABLE
+from ...common.fonts import font_cache_stats, get_system_font_names, load_font, start_font_catalog, BIDI_AVAILABLE
+
+# Load or build the font catalog while ComfyUI starts; INPUT_TYPES only reads it
+start_font_catalog()
+
+
+@functools.lru_cache(maxsize=16)
+def _render_layer(width, height, text, font_name, base_font_size, auto_scale, auto_scale_factor, scale_reference,
+                  text_orientation, text_vertical_pos, text_horizontal_pos, vertical_text_direction, opacity,
+                  margin_x, margin_y, force_rtl):
+    """
+    Draw the watermark on a transparent frame-sized layer once and crop it to the drawn pixels.
+    Returns:
+        (x, y, color [h, w, 3], alpha [h, w, 1]) as float tensors in 0-1, or None if nothing lands in the frame
+    """
+    overlay = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    fill_color = (255, 255, 255, int(255 * opacity))
+    stroke_color = (0, 0, 0, int(255 * opacity * 0.5))
+
+    # Calculate font size
+    calculated_font_size = base_font_size
+    if auto_scale:
+        base_dim = {"width": width, "height": height, "diagonal": (width**2 + height**2)**0.5}.get(scale_reference, width)
+        calculated_font_size = max(8, min(int(base_dim * auto_scale_factor), 200))
+
+    font = load_font(font_name, calculated_font_size)
+
+    # BiDi handling
+    def is_rtl_text(s):
+        return sum(1 for c in s if '\u0590' <= c <= '\uFEFF') > len(s) * 0.3
+
+    is_rtl = force_rtl or (not BIDI_AVAILABLE and is_rtl_text(text))
+    display_text = text
+    if BIDI_AVAILABLE:
+        from bidi.algorithm import get_display
+        display_text = get_display(text)
+    elif is_rtl:
+        display_text = text[::-1]
+
+    bbox = font.getbbox(display_text)
+    offset_x, offset_y = -min(0, bbox[0]), -min(0, bbox[1])
+    text_width = bbox[2] - bbox[0]
+    text_height_for_positioning = bbox[3]
+
+    if text_orientation == "vertical":
+        canvas_w = int(text_width) + 20 + offset_x
+        canvas_h = int(text_height_for_positioning) + 20 + offset_y
+        text_img = Image.new("RGBA", (canvas_w, canvas_h), (0, 0, 0, 0))
+        text_draw = ImageDraw.Draw(text_img)
+        text_draw.text((offset_x + 10, offset_y + 10), display_text, font=font, fill=fill_color, stroke_width=2, stroke_fill=stroke_color)
+        try:
+            resample = Image.Resampling.BICUBIC
+        except AttributeError:
+            resample = Image.BICUBIC
+        rotated = text_img.rotate(90 if vertical_text_direction == "bottom-to-top" else -90, expand=True, resample=resample)
+        rw, rh = rotated.size
+        internal_padding = 10
+        if text_horizontal_pos == "left":
+            x = margin_x - internal_padding if vertical_text_direction == "top-to-bottom" else margin_x - (internal_padding * 2)
+        elif text_horizontal_pos == "center":
+            x = (width - rw) // 2
+        else:
+            x = width - rw - margin_x + (internal_padding * 2 if vertical_text_direction == "top-to-bottom" else internal_padding)
+        y = {"top": margin_y - internal_padding, "middle": (height - rh) // 2, "bottom": height - rh - margin_y + internal_padding}.get(text_vertical_pos, height - rh - margin_y + internal_padding)
+        overlay.paste(rotated, (x, y), rotated)
+    else:
+        x = {"left": margin_x, "center": (width - text_width) // 2, "right": width - text_width - margin_x}.get(text_horizontal_pos, width - text_width - margin_x)
+        y = {"top": margin_y - bbox[1], "middle": (height - text_height_for_positioning) // 2, "bottom": height - text_height_for_positioning - margin_y}.get(text_vertical_pos, height - text_height_for_positioning - margin_y)
+        draw = ImageDraw.Draw(overlay)
+        draw.text((x + offset_x, y + offset_y), display_text, font=font, fill=fill_color, stroke_width=2, stroke_fill=stroke_color)
+
+    # Only the region the text touches is blended into the frames
+    roi = overlay.getchannel("A").getbbox()
+    if roi is None:
+        return None
+    layer = torch.from_numpy(np.asarray(overlay.crop(roi), dtype=np.float32) / 255.0)
+    return roi[0], roi[1], layer[..., :3].contiguous(), layer[..., 3:].contiguous()
+
 
 class TextWatermark:
     """Adds customizable text watermark with RTL support, auto-scaling, and precise positioning."""
@@ -30,6 +108,11 @@ class TextWatermark:
             }
         }
 
+    @classmethod
+    def VALIDATE_INPUTS(cls, font_name="Arial"):
+        # Saved workflows may name a font the catalog has not listed yet; load_font falls back
+        return True
+
     RETURN_TYPES = ("IMAGE",)
     RETURN_NAMES = ("watermarked_images",)
     FUNCTION = "add_watermark"
@@ -43,75 +126,25 @@ class TextWatermark:
         if not text or not text.strip():
             return (images,)
 
-        batch_size = images.shape[0]
-        result = []
-
-        for i in range(batch_size):
-            img_tensor = images[i].cpu()
-            img_np = (img_tensor.numpy() * 255.0).clip(0, 255).astype(np.uint8)
-            if img_np.shape[2] == 4:
-                img_np = img_np[:, :, :3]
-            pil_img = Image.fromarray(img_np, mode="RGB").convert("RGBA")
-            width, height = pil_img.size
-
-            overlay = Image.new("RGBA", (width, height), (0, 0, 0, 0))
-            fill_color = (255, 255, 255, int(255 * opacity))
-            stroke_color = (0, 0, 0, int(255 * opacity * 0.5))
-
-            # Calculate font size
-            calculated_font_size = base_font_size
-            if auto_scale:
-                base_dim = {"width": width, "height": height, "diagonal": (width**2 + height**2)**0.5}.get(scale_reference, width)
-                calculated_font_size = max(8, min(int(base_dim * auto_scale_factor), 200))
-
-            font = load_font(font_name, calculated_font_size)
-
-            # BiDi handling
-            def is_rtl_text(s):
-                return sum(1 for c in s if '\u0590' <= c <= '\uFEFF') > len(s) * 0.3
-
-            is_rtl = force_rtl or (not BIDI_AVAILABLE and is_rtl_text(text))
-            display_text = text
-            if BIDI_AVAILABLE:
-                from bidi.algorithm import get_display
-                display_text = get_display(text)
-            elif is_rtl:
-                display_text = text[::-1]
-
-            bbox = font.getbbox(display_text)
-            offset_x, offset_y = -min(0, bbox[0]), -min(0, bbox[1])
-            text_width = bbox[2] - bbox[0]
-            text_height_for_positioning = bbox[3]
-
-            if text_orientation == "vertical":
-                canvas_w = int(text_width) + 20 + offset_x
-                canvas_h = int(text_height_for_positioning) + 20 + offset_y
-                text_img = Image.new("RGBA", (canvas_w, canvas_h), (0, 0, 0, 0))
-                text_draw = ImageDraw.Draw(text_img)
-                text_draw.text((offset_x + 10, offset_y + 10), display_text, font=font, fill=fill_color, stroke_width=2, stroke_fill=stroke_color)
-                try:
-                    resample = Image.Resampling.BICUBIC
-                except AttributeError:
-                    resample = Image.BICUBIC
-                rotated = text_img.rotate(90 if vertical_text_direction == "bottom-to-top" else -90, expand=True, resample=resample)
-                rw, rh = rotated.size
-                internal_padding = 10
-                if text_horizontal_pos == "left":
-                    x = margin_x - internal_padding if vertical_text_direction == "top-to-bottom" else margin_x - (internal_padding * 2)
-                elif text_horizontal_pos == "center":
-                    x = (width - rw) // 2
-                else:
-                    x = width - rw - margin_x + (internal_padding * 2 if vertical_text_direction == "top-to-bottom" else internal_padding)
-                y = {"top": margin_y - internal_padding, "middle": (height - rh) // 2, "bottom": height - rh - margin_y + internal_padding}.get(text_vertical_pos, height - rh - margin_y + internal_padding)
-                overlay.paste(rotated, (x, y), rotated)
-            else:
-                x = {"left": margin_x, "center": (width - text_width) // 2, "right": width - text_width - margin_x}.get(text_horizontal_pos, width - text_width - margin_x)
-                y = {"top": margin_y - bbox[1], "middle": (height - text_height_for_positioning) // 2, "bottom": height - text_height_for_positioning - margin_y}.get(text_vertical_pos, height - text_height_for_positioning - margin_y)
-                draw = ImageDraw.Draw(overlay)
-                draw.text((x + offset_x, y + offset_y), display_text, font=font, fill=fill_color, stroke_width=2, stroke_fill=stroke_color)
-
-            watermarked = Image.alpha_composite(pil_img, overlay).convert("RGB")
-            result.append(torch.from_numpy(np.array(watermarked).astype(np.float32) / 255.0))
-
-        log(LogEntry(node_class="TextWatermark", title="Watermark applied", details={"Batch Size": batch_size}))
-        return (torch.stack(result, dim=0),)
\ No newline at end of file
+        batch_size, height, width = images.shape[:3]
+        hits = _render_layer.cache_info().hits
+        layer = _render_layer(width, height, text, font_name, base_font_size, auto_scale, auto_scale_factor,
+                              scale_reference, text_orientation, text_vertical_pos, text_horizontal_pos,
+                              vertical_text_direction, opacity, margin_x, margin_y, force_rtl)
+
+        # Output is RGB like the PIL composite was; the batch is copied once and blended in place
+        result = images[..., :3].clone()
+        if layer is not None:
+            x, y, color, alpha = layer
+            color = color.to(device=result.device, dtype=result.dtype)
+            alpha = alpha.to(device=result.device, dtype=result.dtype)
+            roi = result[:, y:y + color.shape[0], x:x + color.shape[1]]
+            roi.mul_(1.0 - alpha).add_(color * alpha)
+
+        log(LogEntry(node_class="TextWatermark", title="Watermark applied", details={
+            "Batch Size": batch_size,
+            "Layer": "cached" if _render_layer.cache_info().hits > hits else "rendered",
+            "Region": f"{layer[2].shape[1]}x{layer[2].shape[0]}" if layer is not None else "outside frame",
+            **font_cache_stats(),
+        }))
+        return (result,)
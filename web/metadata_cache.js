@@ -1,6 +1,8 @@
 // ComfyUI-StalkerVr/web/metadata_cache.js
 import { app } from "../../../scripts/app.js";
 
+const METADATA_DEBOUNCE_MS = 250;
+
 app.registerExtension({
     name: "Stalker.MetadataCache",
 
@@ -18,15 +20,11 @@ app.registerExtension({
 
                     const originalCallback = imageWidget.callback;
 
-                    imageWidget.callback = async (value) => {
-                        console.log(`[MetadataCache] Image selection changed: "${value}"`);
-
-                        // Skip temporary mask editor files
-                        if (!value || typeof value !== 'string' || value.includes("clipspace-painted-masked-")) {
-                            console.warn(`[MetadataCache] Skipping temp mask file: "${value}"`);
-                            return originalCallback?.(value);
-                        }
+                    // Rapid widget changes (scrolling through the list, mask editor round-trips)
+                    // collapse into a single request for the last selected file.
+                    let debounceTimer = null;
 
+                    const sendCacheRequest = async (value) => {
                         try {
                             console.log(`[MetadataCache] Sending cache request for: "${value}"`);
 
@@ -45,6 +43,19 @@ app.registerExtension({
                         } catch (e) {
                             console.error(`[MetadataCache] Failed to cache metadata for "${value}":`, e);
                         }
+                    };
+
+                    imageWidget.callback = (value) => {
+                        console.log(`[MetadataCache] Image selection changed: "${value}"`);
+
+                        // Skip temporary mask editor files
+                        if (!value || typeof value !== 'string' || value.includes("clipspace-painted-masked-")) {
+                            console.warn(`[MetadataCache] Skipping temp mask file: "${value}"`);
+                            return originalCallback?.(value);
+                        }
+
+                        clearTimeout(debounceTimer);
+                        debounceTimer = setTimeout(() => sendCacheRequest(value), METADATA_DEBOUNCE_MS);
 
                         return originalCallback?.(value);
                     };